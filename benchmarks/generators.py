@@ -0,0 +1,76 @@
+import random
+from bio_functions import translate
+
+STOP_CODONS = ('TAA', 'TAG', 'TGA')
+SENSE_CODONS = [a + b + c for a in 'ACGT' for b in 'ACGT' for c in 'ACGT' if a + b + c not in STOP_CODONS]
+
+# Highly abundant yeast proteins from data/4932-WHOLE_ORGANISM-integrated.txt, so the fixture feeds UTRChooser.initiate
+FIXTURE_GENES = [
+    ('YGR192C', 'TDH3'), ('YKL060C', 'FBA1'), ('YHR174W', 'ENO2'), ('YCR012W', 'PGK1'),
+    ('YLR044C', 'PDC1'), ('YAL038W', 'CDC19'), ('YJL189W', 'RPL39'), ('YOL086C', 'ADH1'),
+    ('YBR118W', 'TEF2'), ('YDR050C', 'TPI1'), ('YGR254W', 'ENO1'), ('YLR109W', 'AHP1'),
+]
+
+def random_dna(length, rng):
+    """
+    Generates a random DNA sequence.
+
+    Parameters:
+        length (int): Number of bases.
+        rng (random.Random): The seeded random generator.
+
+    Returns:
+        str: The DNA sequence.
+    """
+    return ''.join(rng.choice('ACGT') for _ in range(length))
+
+def random_cds(codons, rng):
+    """
+    Generates a random open reading frame: ATG, random sense codons and a TAA stop.
+
+    Parameters:
+        codons (int): Total number of codons, including the start and stop codons.
+        rng (random.Random): The seeded random generator.
+
+    Returns:
+        str: The coding sequence.
+    """
+    return 'ATG' + ''.join(rng.choice(SENSE_CODONS) for _ in range(codons - 2)) + 'TAA'
+
+def write_genbank_fixture(path, seed=134, contigs=2):
+    """
+    Writes a small synthetic GenBank file whose genes use the locus tags in FIXTURE_GENES.
+    Locus tags ending in W are placed on the forward strand and those ending in C on the reverse strand.
+
+    Parameters:
+        path (str): The destination file.
+        seed (int): Seed for the random generator.
+        contigs (int): Number of records to spread the genes over.
+    """
+    from Bio.Seq import Seq
+    from Bio.SeqFeature import SeqFeature, FeatureLocation
+    from Bio.SeqRecord import SeqRecord
+    from Bio import SeqIO
+    from bio_functions import reverse_complement
+
+    rng = random.Random(seed)
+    records = []
+    per_contig = -(-len(FIXTURE_GENES) // contigs)
+    for index in range(contigs):
+        sequence, features = '', []
+        for locus_tag, gene in FIXTURE_GENES[index * per_contig:(index + 1) * per_contig]:
+            sequence += random_dna(rng.randint(120, 300), rng)
+            cds = random_cds(rng.randint(80, 250), rng)
+            strand = 1 if locus_tag.endswith('W') else -1
+            start = len(sequence)
+            sequence += cds if strand == 1 else reverse_complement(cds)
+            location = FeatureLocation(start, len(sequence), strand=strand)
+            qualifiers = {'locus_tag': [locus_tag], 'gene': [gene]}
+            features.append(SeqFeature(location, type='gene', qualifiers=dict(qualifiers)))
+            features.append(SeqFeature(location, type='CDS', qualifiers=dict(qualifiers, translation=[translate(cds)[:-1]])))
+        sequence += random_dna(200, rng)
+        record = SeqRecord(Seq(sequence), id=f'FIXTURE{index + 1}', name=f'FIXTURE{index + 1}',
+                           description=f'Synthetic benchmark contig {index + 1}', features=features,
+                           annotations={'molecule_type': 'DNA'})
+        records.append(record)
+    SeqIO.write(records, path, 'genbank')
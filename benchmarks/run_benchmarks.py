@@ -0,0 +1,207 @@
+"""
+Benchmarks for the design hot paths.
+
+Usage (from the repository root):
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json --threshold 0.2
+
+Every benchmark uses sequences from benchmarks/generators.py with a fixed seed, and UTRChooser is loaded from the
+bundled benchmarks/data/fixture.gbff, so results only depend on the code and the machine. --compare exits with
+status 1 when any benchmark's median time grew by more than the threshold relative to the baseline.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bio_functions import calculate_edit_distance, hairpin_counter, translate, window_profile
+from folding import _fold
+from benchmarks.generators import random_cds, random_dna
+
+FIXTURE = os.path.join(ROOT, 'benchmarks', 'data', 'fixture.gbff')
+PROTEOMICS = os.path.join(ROOT, 'data', '4932-WHOLE_ORGANISM-integrated.txt')
+
+def _chooser():
+    from design_utr import UTRChooser
+    chooser = UTRChooser()
+    chooser.genbank_file = FIXTURE
+    chooser.proteomics_file = PROTEOMICS
+    chooser.initiate()
+    return chooser
+
+def _checker():
+    from checkers.forbidden_sequence_checker import ForbiddenSequenceChecker
+    checker = ForbiddenSequenceChecker()
+    checker.initiate()
+    return checker
+
+def _designer():
+    from design_primer import PrimerDesigner
+    designer = PrimerDesigner()
+    designer.initiate()
+    return designer
+
+def build_benchmarks(quick=False, full=False, seed=134):
+    """
+    Builds the benchmark cases.
+
+    Parameters:
+        quick (bool): Only use the smallest sizes of each benchmark.
+        full (bool): Also include chromosome-sized inputs (1.5 Mb) where the function supports them.
+        seed (int): Seed for the synthetic sequence generators.
+
+    Returns:
+        list: (name, callable) pairs; each callable runs one iteration of the benchmark.
+    """
+    rng = random.Random(seed)
+    def sizes(*values):
+        return values[:1] if quick else values
+
+    cases = []
+    for length in sizes(50, 500, 3000):
+        sequence = random_dna(length, rng)
+        cases.append((f'hairpin_counter[{length}bp]', lambda s=sequence: hairpin_counter(s)))
+        cases.append((f'window_profile[{length}bp]', lambda s=sequence: list(window_profile(s, 50))))
+
+    for length in sizes(6, 60, 300):
+        a = translate(random_cds(length + 2, rng))[1:-1]
+        b = translate(random_cds(length + 2, rng))[1:-1]
+        cases.append((f'calculate_edit_distance[{length}aa]', lambda a=a, b=b: calculate_edit_distance(a, b)))
+
+    checker = _checker()
+    chromosome_sizes = sizes(50, 3000, 230000) + ((1500000,) if full else ())
+    for length in chromosome_sizes:
+        sequence = random_dna(length, rng)
+        cases.append((f'ForbiddenSequenceChecker.run[{length}bp]', lambda s=sequence: checker.run(s)))
+
+    cases.append(('UTRChooser.initiate[fixture]', _chooser))
+    chooser = _chooser()
+    cached_chooser = _chooser()
+    cached_chooser.enable_result_cache()
+    for codons in sizes(100, 1000):
+        cds = random_cds(codons, rng)
+        cases.append((f'UTRChooser.run[{codons * 3}bp]', lambda c=cds: chooser.run(c, 3, set())))
+    cds = random_cds(100, rng)
+    cases.append(('UTRChooser.run[cached]', lambda c=cds: cached_chooser.run(c, 3, set())))
+
+    designer = _designer()
+    for codons in sizes(300, 1700):
+        cds = random_cds(codons, rng)
+        utr5, utr3 = random_dna(50, rng), random_dna(50, rng)
+        cases.append((f'PrimerDesigner.run[{codons * 3}bp]', lambda c=cds, u5=utr5, u3=utr3: designer.run(c, u5, u3, "BsaI", "Golden Gate")))
+
+    # Unmemoised, so each call folds: the cost of scoring one option, and a batch of options, under the "mfe" model
+    for length in sizes(40, 80):
+        sequence = random_dna(length, rng)
+        cases.append((f'mfe[{length}bp]', lambda s=sequence: _fold([s])))
+    if not quick:
+        batch = [random_dna(80, rng) for _ in range(64)]
+        cases.append(('mfe_many[64x80bp]', lambda b=batch: _fold(b)))
+    return cases
+
+def measure(function, repeats=5, min_time=0.05):
+    """
+    Times a callable, calibrating the number of loops per repeat so each repeat lasts at least min_time.
+
+    Parameters:
+        function (callable): The benchmark body.
+        repeats (int): Number of timed repeats.
+        min_time (float): Minimum duration of one repeat, in seconds.
+
+    Returns:
+        dict: Median and minimum seconds per call, and the loop and repeat counts used.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        timings.append((time.perf_counter() - start) / loops)
+    return {'median_s': statistics.median(timings), 'min_s': min(timings), 'loops': loops, 'repeats': repeats}
+
+def compare(results, baseline, threshold):
+    """
+    Compares benchmark results with a baseline.
+
+    Parameters:
+        results (dict): Benchmark name -> measurement, as produced by measure.
+        baseline (dict): The same structure loaded from a stored baseline.
+        threshold (float): Allowed relative slowdown of the median (0.2 = 20%).
+
+    Returns:
+        list: (name, baseline median, current median, ratio, regressed) for every benchmark in both sets.
+    """
+    rows = []
+    for name, measurement in results.items():
+        if name in baseline:
+            ratio = measurement['median_s'] / baseline[name]['median_s']
+            rows.append((name, baseline[name]['median_s'], measurement['median_s'], ratio, ratio > 1 + threshold))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the design hot paths.")
+    parser.add_argument('--output', help="Write results as JSON to this file (default: stdout).")
+    parser.add_argument('--save-baseline', help="Write results to this file for later --compare runs.")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against.")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed relative slowdown before failing.")
+    parser.add_argument('--filter', default='', help="Only run benchmarks whose name contains this text.")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help="Only run the smallest size of each benchmark.")
+    parser.add_argument('--full', action='store_true', help="Include chromosome-sized inputs.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    # The code under test prints diagnostics (e.g. matched forbidden sites); keep stdout for the JSON report
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            cases = build_benchmarks(args.quick, args.full)
+        for name, function in cases:
+            if args.filter in name:
+                with contextlib.redirect_stdout(devnull):
+                    results[name] = measure(function, args.repeats)
+                print(f"{name:45s} {results[name]['median_s'] * 1e3:12.4f} ms", file=sys.stderr)
+
+    report = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as handle:
+                json.dump(report, handle, indent=2)
+    if not args.output and not args.save_baseline:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)['results']
+        rows = compare(results, baseline, args.threshold)
+        for name, before, after, ratio, regressed in rows:
+            print(f"{name:45s} {before * 1e3:10.4f} -> {after * 1e3:10.4f} ms  x{ratio:5.2f}{'  REGRESSION' if regressed else ''}", file=sys.stderr)
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
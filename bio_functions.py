@@ -1,3 +1,23 @@
+# Standard genetic code; '_' marks stop codons
+CODON_TABLE = {
+    'ATA':'I', 'ATC':'I', 'ATT':'I', 'ATG':'M',
+    'ACA':'T', 'ACC':'T', 'ACG':'T', 'ACT':'T',
+    'AAC':'N', 'AAT':'N', 'AAA':'K', 'AAG':'K',
+    'AGC':'S', 'AGT':'S', 'AGA':'R', 'AGG':'R',
+    'CTA':'L', 'CTC':'L', 'CTG':'L', 'CTT':'L',
+    'CCA':'P', 'CCC':'P', 'CCG':'P', 'CCT':'P',
+    'CAC':'H', 'CAT':'H', 'CAA':'Q', 'CAG':'Q',
+    'CGA':'R', 'CGC':'R', 'CGG':'R', 'CGT':'R',
+    'GTA':'V', 'GTC':'V', 'GTG':'V', 'GTT':'V',
+    'GCA':'A', 'GCC':'A', 'GCG':'A', 'GCT':'A',
+    'GAC':'D', 'GAT':'D', 'GAA':'E', 'GAG':'E',
+    'GGA':'G', 'GGC':'G', 'GGG':'G', 'GGT':'G',
+    'TCA':'S', 'TCC':'S', 'TCG':'S', 'TCT':'S',
+    'TTC':'F', 'TTT':'F', 'TTA':'L', 'TTG':'L',
+    'TAC':'Y', 'TAT':'Y', 'TAA':'_', 'TAG':'_',
+    'TGC':'C', 'TGT':'C', 'TGA':'_', 'TGG':'W',
+}
+
 def hairpin_counter(sequence, min_stem=3, min_loop=4, max_loop=9):
     """
     Counts the number of potential hairpin structures in a DNA sequence and returns a simple linear
@@ -43,6 +63,63 @@ def hairpin_counter(sequence, min_stem=3, min_loop=4, max_loop=9):
     # Return count and the formatted hairpin string, or None if no hairpins found
     return count, hairpin_string if count > 0 else None
 
+def window_profile(sequence, window, step=1, min_stem=3, min_loop=4, max_loop=9):
+    """
+    Profiles hairpin counts and GC content over a sliding window in linear time.
+
+    Each window reports the same hairpin count hairpin_counter would return for the window's subsequence.
+    The counts are updated incrementally as the window slides: hairpins whose second stem ends at the new
+    right edge are added and hairpins whose first stem starts at the old left edge are removed, and the GC
+    count is kept as a running sum.
+
+    Parameters:
+        sequence (str): The DNA sequence to profile.
+        window (int): The window length; a sequence shorter than this is reported as a single window.
+        step (int): The distance between the starts of consecutive reported windows.
+        min_stem (int): Minimum number of bases in the stem for stable hairpin.
+        min_loop (int): Minimum number of bases in the loop.
+        max_loop (int): Maximum number of bases in the loop.
+
+    Yields:
+        tuple: (start, hairpin count, GC fraction) for each window.
+    """
+    if window < 1 or step < 1:
+        raise ValueError("Window and step must be positive.")
+    seq_len = len(sequence)
+    window = min(window, seq_len)
+    if window == 0:
+        return
+
+    added = [0] * seq_len  # Hairpins in the window, by the start of their first stem
+    hairpins = 0
+    gc = 0
+
+    def add_base(start, end):
+        # Adds the base at end - 1 and the hairpins inside the window whose second stem ends with it
+        nonlocal hairpins, gc
+        gc += sequence[end - 1] in 'GC'
+        j = end - min_stem
+        if j < 0:
+            return
+        stem2_rc = reverse_complement(sequence[j:end])
+        for i in range(max(start, j - min_stem - max_loop), j - min_stem - min_loop + 1):
+            if sequence[i:i+min_stem] == stem2_rc:
+                added[i] += 1
+                hairpins += 1
+
+    for end in range(1, window + 1):
+        add_base(0, end)
+    start = 0
+    while True:
+        if start % step == 0:
+            yield start, hairpins, gc / window
+        if start + window >= seq_len:
+            break
+        hairpins -= added[start]
+        gc -= sequence[start] in 'GC'
+        start += 1
+        add_base(start, start + window)
+
 def calculate_edit_distance(s1, s2):
     """
     Compute the edit distance between two strings using a dynamic programming approach based on the Smith-Waterman algorithm for local alignment.
@@ -113,28 +190,10 @@ def translate(sequence):
     if len(sequence) % 3 != 0:
         raise ValueError("Length of DNA sequence is not a multiple of three, which is required for translation.")
 
-    codon_table = {
-        'ATA':'I', 'ATC':'I', 'ATT':'I', 'ATG':'M',
-        'ACA':'T', 'ACC':'T', 'ACG':'T', 'ACT':'T',
-        'AAC':'N', 'AAT':'N', 'AAA':'K', 'AAG':'K',
-        'AGC':'S', 'AGT':'S', 'AGA':'R', 'AGG':'R',
-        'CTA':'L', 'CTC':'L', 'CTG':'L', 'CTT':'L',
-        'CCA':'P', 'CCC':'P', 'CCG':'P', 'CCT':'P',
-        'CAC':'H', 'CAT':'H', 'CAA':'Q', 'CAG':'Q',
-        'CGA':'R', 'CGC':'R', 'CGG':'R', 'CGT':'R',
-        'GTA':'V', 'GTC':'V', 'GTG':'V', 'GTT':'V',
-        'GCA':'A', 'GCC':'A', 'GCG':'A', 'GCT':'A',
-        'GAC':'D', 'GAT':'D', 'GAA':'E', 'GAG':'E',
-        'GGA':'G', 'GGC':'G', 'GGG':'G', 'GGT':'G',
-        'TCA':'S', 'TCC':'S', 'TCG':'S', 'TCT':'S',
-        'TTC':'F', 'TTT':'F', 'TTA':'L', 'TTG':'L',
-        'TAC':'Y', 'TAT':'Y', 'TAA':'_', 'TAG':'_',
-        'TGC':'C', 'TGT':'C', 'TGA':'_', 'TGG':'W',
-    }
     protein = ""
     for i in range(0, len(sequence), 3):
         codon = sequence[i:i+3]
-        protein += codon_table.get(codon, '_')  # Using '_' for unknown or stop codons
+        protein += CODON_TABLE.get(codon, '_')  # Using '_' for unknown or stop codons
     return protein
 
 if __name__ == "__main__":
@@ -1,7 +1,90 @@
 from bio_functions import *
+
+FIELD_BITS = 7
+FIELD_MASK = (1 << FIELD_BITS) - 1
+FLAG = 1 << (FIELD_BITS - 1)
+MAX_SITE_LENGTH = 64
+
+class MismatchAutomaton:
+    """
+    A precompiled shift-add automaton that finds every occurrence of a set of patterns with up to a per-pattern
+    number of mismatches in one linear pass over a sequence.
+
+    All patterns share one integer state with a 7-bit field per pattern base. The field for base j of a pattern holds
+    63 - k plus the mismatches of the alignment of the pattern's first j + 1 bases ending at the current position,
+    where k is the pattern's budget, so its flag bit (64) is set exactly when the alignment has more than k
+    mismatches. A field never exceeds 127 for patterns of up to 64 bases, so additions never carry into the next field.
+
+    Attributes:
+        patterns (list): (pattern, budget) for each compiled pattern.
+    """
+    def __init__(self, patterns):
+        """
+        Parameters:
+            patterns (list): (pattern, budget) pairs; patterns are uppercase DNA and budgets are mismatch counts.
+        """
+        self.patterns = list(patterns)
+        self.tables = dict.fromkeys('ACGT', 0)
+        self.mismatch_all = 0
+        self.init = 0
+        self.accept = 0
+        self.finals = {}
+        first_fields = 0
+        fields = 0
+        for index, (pattern, budget) in enumerate(self.patterns):
+            if not 0 < len(pattern) <= MAX_SITE_LENGTH:
+                raise ValueError(f"Forbidden sites must be 1 to {MAX_SITE_LENGTH} bases long for approximate matching.")
+            if not 0 <= budget < len(pattern):
+                raise ValueError(f"Mismatch budget for {pattern} must be between 0 and {len(pattern) - 1}.")
+            for j, base in enumerate(pattern):
+                shift = FIELD_BITS * (fields + j)
+                self.mismatch_all |= 1 << shift
+                for letter in self.tables:
+                    if letter != base:
+                        self.tables[letter] |= 1 << shift
+            self.init |= (FLAG - 1 - budget) << (FIELD_BITS * fields)
+            first_fields |= FIELD_MASK << (FIELD_BITS * fields)
+            final_flag = FIELD_BITS * (fields + len(pattern)) - 1
+            self.accept |= 1 << final_flag
+            self.finals[final_flag] = index
+            fields += len(pattern)
+        self.keep = ((1 << (FIELD_BITS * fields)) - 1) & ~first_fields
+        # Alignments that would start before the sequence are flagged from the outset
+        self.start = self.mismatch_all * FLAG
+
+    def search(self, sequence):
+        """
+        Finds every approximate occurrence of the patterns.
+
+        Parameters:
+            sequence (str): The uppercase sequence to search; bases other than A, C, G and T mismatch every pattern.
+
+        Returns:
+            list: (pattern index, start position, mismatches) for each occurrence, in order of where they end.
+        """
+        tables, mismatch_all, keep, init, accept = self.tables, self.mismatch_all, self.keep, self.init, self.accept
+        state = self.start
+        hits = []
+        for position, base in enumerate(sequence):
+            state = (((state << FIELD_BITS) & keep) | init) + tables.get(base, mismatch_all)
+            matched = ~state & accept
+            while matched:
+                bit = matched & -matched
+                matched ^= bit
+                final_flag = bit.bit_length() - 1
+                index = self.finals[final_flag]
+                pattern, budget = self.patterns[index]
+                mismatches = (state >> (final_flag - FIELD_BITS + 1) & FIELD_MASK) - (FLAG - 1 - budget)
+                hits.append((index, position - len(pattern) + 1, mismatches))
+        return hits
+
 class ForbiddenSequenceChecker:
     def __init__(self):
         self.forbidden = []
+        # Site -> number of mismatches tolerated; when set, sites are also caught approximately (others exactly)
+        self.mismatches = {}
+        self._automaton = None
+        self._automaton_key = None
 
     def initiate(self):
         # Populate forbidden sequences
@@ -37,9 +120,13 @@ class ForbiddenSequenceChecker:
 ]
 
 
-    def run(self, dnaseq):
-        # Use the reverse_complement function from seq_utils
-        rc = reverse_complement(dnaseq)
+    def run(self, dnaseq, rc=None):
+        # With mismatches set, the automaton searches both strands itself and rc is not used
+        if self.mismatches:
+            return not self.find_hits(dnaseq)
+        # Use the reverse_complement function from seq_utils, unless the caller already has it
+        if rc is None:
+            rc = reverse_complement(dnaseq)
         combined = (dnaseq + "x" + rc).upper()
 
         for site in self.forbidden:
@@ -47,4 +134,50 @@ class ForbiddenSequenceChecker:
                 print(site)
                 return False
 
-        return True
\ No newline at end of file
+        return True
+
+    def find_sites(self, dnaseq, rc=None):
+        # Report every forbidden site present on either strand, in the order of self.forbidden (rc is only used
+        # for exact matching, as in run)
+        if self.mismatches:
+            found = {hit[0] for hit in self.find_hits(dnaseq)}
+            return [site for site in dict.fromkeys(self.forbidden) if site in found]
+        if rc is None:
+            rc = reverse_complement(dnaseq)
+        combined = (dnaseq + "x" + rc).upper()
+        return [site for site in dict.fromkeys(self.forbidden) if site in combined]
+
+    def find_hits(self, dnaseq):
+        """
+        Finds every occurrence of the forbidden sites on either strand, allowing each site up to its number of
+        mismatches in self.mismatches (sites not listed must match exactly).
+
+        Parameters:
+            dnaseq (str): The DNA sequence to search.
+
+        Returns:
+            list: (site, strand, position, mismatches) for each hit, sorted by position, where strand is 1 for the
+            site itself and -1 for its reverse complement, and position is the 0-based start on dnaseq.
+        """
+        automaton, labels = self._compile()
+        hits = [labels[index] + (position, mismatches) for index, position, mismatches in automaton.search(dnaseq.upper())]
+        hits.sort(key=lambda hit: hit[2])
+        return hits
+
+    def _compile(self):
+        # The automaton is rebuilt only when the sites or budgets change
+        key = (tuple(self.forbidden), tuple(sorted(self.mismatches.items())))
+        if self._automaton_key != key:
+            patterns, labels = [], []
+            for site in dict.fromkeys(self.forbidden):
+                pattern = site.upper()
+                budget = self.mismatches.get(site, 0)
+                patterns.append((pattern, budget))
+                labels.append((site, 1))
+                # A palindromic site's reverse complement hits are the same as its own
+                if reverse_complement(pattern) != pattern:
+                    patterns.append((reverse_complement(pattern), budget))
+                    labels.append((site, -1))
+            self._automaton = (MismatchAutomaton(patterns), labels)
+            self._automaton_key = key
+        return self._automaton
\ No newline at end of file
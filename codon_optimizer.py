@@ -0,0 +1,171 @@
+import math
+from bio_functions import CODON_TABLE, reverse_complement, translate
+
+def build_codon_usage(cdss):
+    """
+    Builds a codon usage table from a collection of coding sequences.
+
+    Parameters:
+        cdss (iterable): Coding sequences (e.g. from highly expressed genes), each a multiple of 3 long.
+
+    Returns:
+        dict: Amino acid -> {codon: frequency among that amino acid's codons}. Amino acids that never occur
+        are left out.
+    """
+    counts = {}
+    for cds in cdss:
+        cds = str(cds)
+        for i in range(0, len(cds) - len(cds) % 3, 3):
+            codon = cds[i:i+3]
+            if codon in CODON_TABLE:
+                counts[codon] = counts.get(codon, 0) + 1
+
+    usage = {}
+    for codon, amino_acid in CODON_TABLE.items():
+        if codon in counts:
+            usage.setdefault(amino_acid, {})[codon] = counts[codon]
+    for amino_acid, codons in usage.items():
+        total = sum(codons.values())
+        usage[amino_acid] = {codon: count / total for codon, count in codons.items()}
+    return usage
+
+class CodonOptimizer:
+    """
+    A class to back-translate a protein (or recode a CDS) using a codon usage table, while avoiding forbidden
+    sites and hairpins.
+
+    The search is a windowed dynamic programme: every partial sequence is summarised by its last few bases
+    (enough to contain any forbidden site or hairpin that can still be completed by the next codon), only the
+    best-scoring partial sequence is kept for each summary, and at most beam_width summaries survive each
+    codon. The work per codon is therefore constant and the whole search scales linearly with protein length.
+
+    Attributes:
+        codon_usage (dict): Amino acid -> {codon: frequency}, as built by build_codon_usage.
+        seq_checker (ForbiddenSequenceChecker): Provides the forbidden sites to avoid on both strands.
+        beam_width (int): Number of partial sequences kept after each codon.
+        min_codon_frequency (float): Codons rarer than this (within their amino acid) are not used.
+        forbidden_penalty (float): Score penalty for each forbidden site created.
+        hairpin_penalty (float): Score penalty for each hairpin stem pair created.
+    """
+    def __init__(self):
+        """
+        Initializes the CodonOptimizer with an empty codon usage table.
+        """
+        self.codon_usage = {}
+        self.seq_checker = None
+
+    def initiate(self, utr_chooser=None):
+        """
+        Loads the codon usage table built from the highly expressed genes used for UTR selection.
+
+        Parameters:
+            utr_chooser (UTRChooser): An initiated chooser to take the codon usage and checker from; a new one
+                is initiated if omitted.
+        """
+        if utr_chooser is None:
+            from design_utr import UTRChooser
+            utr_chooser = UTRChooser()
+            utr_chooser.initiate()
+        self.codon_usage = utr_chooser.codon_usage
+        self.seq_checker = utr_chooser.seq_checker
+        self.beam_width = 16
+        self.min_codon_frequency = 0.05
+        self.forbidden_penalty = 100.0
+        self.hairpin_penalty = 0.5
+
+    def run(self, sequence, is_cds=False, upstream=""):
+        """
+        Encodes a protein with the preferred codons while avoiding forbidden sites and hairpins.
+
+        Parameters:
+            sequence (str): The protein sequence ('_' for a stop), or a CDS if is_cds is True.
+            is_cds (bool): Whether sequence is a CDS to be recoded rather than a protein.
+            upstream (str): Sequence placed before the CDS (e.g. the 5' UTR) so junction sites are also avoided.
+
+        Returns:
+            str: The optimised coding sequence.
+        """
+        protein = translate(sequence) if is_cds else sequence.upper()
+        if not protein:
+            raise ValueError("Protein sequence cannot be empty.")
+        amino_acids = set(CODON_TABLE.values())
+        options = []
+        for amino_acid in protein:
+            if amino_acid not in amino_acids:
+                raise ValueError(f"Invalid amino acid: {amino_acid}")
+            options.append(self._codon_options(amino_acid))
+
+        sites = set()
+        for site in self.seq_checker.forbidden:
+            sites.add(site)
+            sites.add(reverse_complement(site))
+        site_lengths = sorted(set(len(site) for site in sites))
+        min_stem, min_loop, max_loop = 3, 4, 9
+        context = max(max(site_lengths, default=1) - 1, 2 * min_stem + max_loop - 1)
+
+        # Each beam entry: tail -> (score, back-pointer chain of chosen codons)
+        beam = {upstream[-context:]: (0.0, None)}
+        for codons in options:
+            candidates = {}
+            for tail, (score, chain) in beam.items():
+                for codon, weight in codons:
+                    extended = tail + codon
+                    new_score = score + weight
+                    new_score -= self.forbidden_penalty * _sites_ending_in_last(extended, 3, sites, site_lengths)
+                    new_score -= self.hairpin_penalty * _hairpins_ending_in_last(extended, 3, min_stem, min_loop, max_loop)
+                    key = extended[-context:]
+                    if key not in candidates or new_score > candidates[key][0]:
+                        candidates[key] = (new_score, (codon, chain))
+            beam = dict(sorted(candidates.items(), key=lambda item: -item[1][0])[:self.beam_width])
+
+        _, chain = max(beam.values(), key=lambda entry: entry[0])
+        codons = []
+        while chain is not None:
+            codon, chain = chain
+            codons.append(codon)
+        return ''.join(reversed(codons))
+
+    def _codon_options(self, amino_acid):
+        """
+        Returns:
+            list: (codon, log frequency) pairs usable for an amino acid, most frequent first.
+        """
+        synonymous = [codon for codon, aa in CODON_TABLE.items() if aa == amino_acid]
+        usage = self.codon_usage.get(amino_acid, {})
+        options = [(codon, usage.get(codon, 0.0)) for codon in synonymous]
+        usable = [(codon, math.log(frequency)) for codon, frequency in options if frequency >= self.min_codon_frequency]
+        if not usable:
+            # No usage data for this amino acid: treat its codons as equally good
+            usable = [(codon, math.log(1 / len(synonymous))) for codon in synonymous]
+        return sorted(usable, key=lambda option: -option[1])
+
+def _sites_ending_in_last(sequence, n, sites, site_lengths):
+    """
+    Returns:
+        int: Number of forbidden sites (either strand) that end within the last n bases of sequence.
+    """
+    found = 0
+    length = len(sequence)
+    for end in range(max(0, length - n) + 1, length + 1):
+        for site_length in site_lengths:
+            if end >= site_length and sequence[end - site_length:end] in sites:
+                found += 1
+    return found
+
+def _hairpins_ending_in_last(sequence, n, min_stem, min_loop, max_loop):
+    """
+    Returns:
+        int: Number of hairpin stem pairs, as counted by hairpin_counter, whose second stem ends within the
+        last n bases of sequence.
+    """
+    found = 0
+    length = len(sequence)
+    for end in range(max(0, length - n) + 1, length + 1):
+        start2 = end - min_stem
+        if start2 < 0:
+            continue
+        stem2_rc = reverse_complement(sequence[start2:end])
+        for start1 in range(start2 - min_stem - max_loop, start2 - min_stem - min_loop + 1):
+            if start1 >= 0 and sequence[start1:start1 + min_stem] == stem2_rc:
+                found += 1
+    return found
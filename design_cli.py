@@ -0,0 +1,267 @@
+"""
+Command-line driver that runs the gene design pipeline over a file of coding sequences.
+
+Usage (from the repository root; no PYTHONPATH needed):
+    python design_cli.py genes.fasta -o designs.tsv
+    python design_cli.py genes.csv -o designs.jsonl --workers 8 --chunk-size 64
+    python design_cli.py genes.fasta -o designs.tsv --checkpoint designs.ckpt   # rerun the same command to resume
+
+Input records are streamed from FASTA (.fa, .fasta, .fna, .ffn) or CSV/TSV files with a name and a cds column, run
+through GenePipeline (UTR selection, forbidden site screening and primer design), and written as they complete, one
+TSV row or JSON line per record, in input order. Records that fail validation are written with their error message
+instead of stopping the run. With --checkpoint, progress is recorded after every chunk; an interrupted run started
+again with the same arguments truncates any partially written output and continues after the last completed record.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+FASTA_EXTENSIONS = ('.fa', '.fasta', '.fna', '.ffn')
+OUTPUT_FIELDS = ['name', 'status', 'utr5_gene', 'utr5', 'utr3_gene', 'utr3', 'forward_primer', 'reverse_primer',
+                 'forbidden_sites', 'construct', 'error']
+
+def read_fasta(handle):
+    """
+    Streams records from a FASTA file.
+
+    Parameters:
+        handle (file): The open FASTA file.
+
+    Yields:
+        tuple: (name, sequence), with the name taken from the first word of the header and the sequence uppercased.
+    """
+    name, lines = None, []
+    for line in handle:
+        line = line.strip()
+        if line.startswith('>'):
+            if name is not None:
+                yield name, ''.join(lines).upper()
+            name, lines = line[1:].split(maxsplit=1)[0] if line[1:].strip() else '', []
+        elif line:
+            if name is None:
+                raise ValueError("FASTA input must start with a '>' header line.")
+            lines.append(line)
+    if name is not None:
+        yield name, ''.join(lines).upper()
+
+def read_table(handle, delimiter=','):
+    """
+    Streams records from a CSV or TSV file with a header row.
+
+    Parameters:
+        handle (file): The open file.
+        delimiter (str): The column delimiter.
+
+    Yields:
+        tuple: (name, sequence) from the name (or id) and cds (or sequence) columns.
+    """
+    reader = csv.DictReader(handle, delimiter=delimiter)
+    columns = {column.strip().lower(): column for column in reader.fieldnames or []}
+    name_column = columns.get('name') or columns.get('id')
+    cds_column = columns.get('cds') or columns.get('sequence')
+    if name_column is None or cds_column is None:
+        raise ValueError("Table input needs a 'name' (or 'id') column and a 'cds' (or 'sequence') column.")
+    for row in reader:
+        yield row[name_column], row[cds_column].strip().upper()
+
+def read_records(path, input_format=None):
+    """
+    Streams (name, cds) records from a FASTA, CSV or TSV file.
+
+    Parameters:
+        path (str): The input file.
+        input_format (str): "fasta", "csv" or "tsv"; guessed from the extension if omitted.
+
+    Yields:
+        tuple: (name, cds) for each record.
+    """
+    if input_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        input_format = 'fasta' if extension in FASTA_EXTENSIONS else 'tsv' if extension == '.tsv' else 'csv'
+    with open(path, newline='') as handle:
+        if input_format == 'fasta':
+            yield from read_fasta(handle)
+        elif input_format in ('csv', 'tsv'):
+            yield from read_table(handle, '\t' if input_format == 'tsv' else ',')
+        else:
+            raise ValueError(f"Unsupported input format: {input_format}")
+
+def design_row(name, design, error):
+    """
+    Flattens a pipeline result into an output row.
+
+    Parameters:
+        name (str): The record name.
+        design (GeneDesign): The design, or None if the record failed.
+        error (str): The error message, or None.
+
+    Returns:
+        dict: The values for OUTPUT_FIELDS.
+    """
+    if design is None:
+        return dict.fromkeys(OUTPUT_FIELDS, '') | {'name': name, 'status': 'error', 'error': error}
+    return {
+        'name': name,
+        'status': 'ok',
+        'utr5_gene': design.utr5.gene_name,
+        'utr5': design.utr5.utr,
+        'utr3_gene': design.utr3.gene_name,
+        'utr3': design.utr3.utr,
+        'forward_primer': design.primers['forward_primer'],
+        'reverse_primer': design.primers['reverse_primer'],
+        'forbidden_sites': ','.join(design.forbidden_sites),
+        'construct': design.construct,
+        'error': '',
+    }
+
+class ResultWriter:
+    """
+    Writes output rows as TSV or JSON lines.
+    """
+    def __init__(self, handle, output_format, header):
+        """
+        Parameters:
+            handle (file): The open output file.
+            output_format (str): "tsv" or "jsonl".
+            header (bool): Whether to write the TSV header row.
+        """
+        if output_format not in ('tsv', 'jsonl'):
+            raise ValueError(f"Unsupported output format: {output_format}")
+        self.handle = handle
+        self.output_format = output_format
+        if output_format == 'tsv' and header:
+            handle.write('\t'.join(OUTPUT_FIELDS) + '\n')
+
+    def write(self, row):
+        if self.output_format == 'jsonl':
+            self.handle.write(json.dumps(row) + '\n')
+        else:
+            self.handle.write('\t'.join(str(row[field]).replace('\t', ' ').replace('\n', ' ') for field in OUTPUT_FIELDS) + '\n')
+
+def load_checkpoint(path, arguments):
+    """
+    Returns:
+        dict: The checkpoint {"records", "output_bytes", "arguments"}, or None if there is none to resume from.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        checkpoint = json.load(handle)
+    if checkpoint.get('arguments') != arguments:
+        raise ValueError(f"Checkpoint {path} was written for a different input, output or format, or the input has "
+                         f"changed since; remove it to start over.")
+    output = arguments['output']
+    if not os.path.exists(output) or os.path.getsize(output) < checkpoint['output_bytes']:
+        raise ValueError(f"Output {output} is missing or shorter than checkpoint {path} records; remove the "
+                         f"checkpoint to start over.")
+    return checkpoint
+
+def save_checkpoint(path, arguments, records, output_bytes):
+    # Written to a temporary file and renamed, so an interruption never leaves a half-written checkpoint
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as handle:
+        json.dump({'arguments': arguments, 'records': records, 'output_bytes': output_bytes}, handle)
+    os.replace(temporary, path)
+
+def run(pipeline, input_path, output_path, output_format='tsv', input_format=None, workers=1, chunksize=64,
+        checkpoint_path=None, progress=None):
+    """
+    Streams records from a file through a pipeline and writes the results incrementally.
+
+    Parameters:
+        pipeline (GenePipeline): An initiated pipeline.
+        input_path (str): The FASTA, CSV or TSV input file.
+        output_path (str): The TSV or JSONL output file.
+        output_format (str): "tsv" or "jsonl".
+        input_format (str): "fasta", "csv" or "tsv"; guessed from the extension if omitted.
+        workers (int): Number of worker processes.
+        chunksize (int): Number of records sent to a worker at a time, and records between checkpoints.
+        checkpoint_path (str): File to record progress in and resume from, or None.
+        progress (callable): Called as progress(records done, errors) after every chunk.
+
+    Returns:
+        tuple: (records written in this run, records that failed).
+    """
+    # The input's size and modification time identify its contents, so an edited input is not resumed
+    status = os.stat(input_path)
+    arguments = {'input': os.path.abspath(input_path), 'input_size': status.st_size, 'input_mtime': status.st_mtime_ns,
+                 'output': os.path.abspath(output_path), 'format': output_format}
+    checkpoint = load_checkpoint(checkpoint_path, arguments)
+    done = checkpoint['records'] if checkpoint else 0
+
+    records = islice(read_records(input_path, input_format), done, None)
+    with open(output_path, 'r+' if checkpoint else 'w', newline='') as handle:
+        if checkpoint:
+            # Drop anything written after the last checkpoint; those records are designed again
+            handle.truncate(checkpoint['output_bytes'])
+            handle.seek(checkpoint['output_bytes'])
+        writer = ResultWriter(handle, output_format, header=not checkpoint)
+        written = errors = 0
+        for name, design, error in pipeline.run_many(records, workers, chunksize):
+            writer.write(design_row(name, design, error))
+            written += 1
+            errors += error is not None
+            if written % chunksize == 0:
+                handle.flush()
+                if checkpoint_path:
+                    save_checkpoint(checkpoint_path, arguments, done + written, handle.tell())
+                if progress:
+                    progress(done + written, errors)
+        handle.flush()
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, arguments, done + written, handle.tell())
+    return written, errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Design UTRs and primers for every CDS in a FASTA or CSV file.")
+    parser.add_argument('input', help="FASTA, CSV or TSV file of coding sequences.")
+    parser.add_argument('-o', '--output', required=True, help="Output file (.tsv or .jsonl).")
+    parser.add_argument('--format', choices=['tsv', 'jsonl'], help="Output format (default: from the output extension).")
+    parser.add_argument('--input-format', choices=['fasta', 'csv', 'tsv'], help="Input format (default: from the extension).")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes.")
+    parser.add_argument('--chunk-size', type=int, default=64, help="Records per worker task and per checkpoint.")
+    parser.add_argument('--checkpoint', help="Progress file; rerun with the same arguments to resume.")
+    parser.add_argument('--method', default="Gibson", help="Cloning method for primer design (Gibson or Golden Gate).")
+    parser.add_argument('--enzyme', help="Restriction enzyme for Golden Gate primers.")
+    parser.add_argument('--genbank', help="GenBank file to take UTR options from.")
+    parser.add_argument('--sequence-store', help="Packed sequence store to take UTR options from instead of GenBank.")
+    parser.add_argument('--proteomics', help="Proteomics abundance file used to pick the source genes.")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.chunk_size < 1:
+        parser.error("--workers and --chunk-size must be positive.")
+    output_format = args.format or ('jsonl' if args.output.endswith('.jsonl') else 'tsv')
+
+    from design_pipeline import GenePipeline
+    from design_utr import UTRChooser
+
+    chooser = UTRChooser()
+    if args.genbank:
+        chooser.genbank_file = args.genbank
+    if args.sequence_store:
+        chooser.sequence_store = args.sequence_store
+    if args.proteomics:
+        chooser.proteomics_file = args.proteomics
+    chooser.initiate()
+    chooser.enable_result_cache()
+    pipeline = GenePipeline()
+    pipeline.initiate(chooser)
+    pipeline.method = args.method
+    pipeline.enzyme = args.enzyme
+
+    def progress(done, errors):
+        print(f"{done} records designed, {errors} errors", file=sys.stderr)
+
+    try:
+        written, errors = run(pipeline, args.input, args.output, output_format, args.input_format, args.workers,
+                              args.chunk_size, args.checkpoint, progress)
+    except (ValueError, OSError) as e:  # Invalid input or checkpoint, or an unreadable input or output file
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Wrote {written} records ({errors} errors) to {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from bio_functions import reverse_complement, translate
+from design_utr import UTRChooser, UTROption
+from design_primer import PrimerDesigner
+from utils.construction_file import PCR, ConstructionFile
+from utils.construction_simulator import Product, pcr
+
+@dataclass
+class GeneDesign:
+    """
+    The result of running a CDS through the gene design pipeline.
+
+    Attributes:
+        name (str): The name of the construct.
+        cds (str): The input coding sequence.
+        utr5 (UTROption): The chosen 5' UTR.
+        utr3 (UTROption): The chosen 3' UTR, including its poly-A tail.
+        construct (str): The assembled 5' UTR + CDS + 3' UTR sequence.
+        primers (dict): Forward and reverse primers amplifying the construct.
+        forbidden_sites (list): Forbidden sites found in the construct, ignoring the poly-A tail.
+        construction_file (ConstructionFile): The PCR step that builds the construct from its primers.
+    """
+    name: str
+    cds: str
+    utr5: UTROption
+    utr3: UTROption
+    construct: str
+    primers: dict
+    forbidden_sites: list
+    construction_file: ConstructionFile
+
+class GenePipeline:
+    """
+    Runs 5'/3' UTR selection, forbidden site screening and primer design on a CDS as one pipeline.
+
+    The CDS is validated and translated once, the stages share the chooser's ForbiddenSequenceChecker and the
+    reverse complement of the construct, and the result is emitted as a ConstructionFile.
+
+    The 3' UTR is never taken from the same source gene option as the 5' UTR, so the construct does not carry two
+    copies of one genomic sequence that primers or recombination could confuse.
+
+    Attributes:
+        utr_chooser (UTRChooser): The chooser used for both UTRs.
+        primer_designer (PrimerDesigner): The designer used for the construct primers.
+        seq_checker (ForbiddenSequenceChecker): The checker used to screen the assembled construct.
+        method (str): The cloning method passed to the primer designer.
+        enzyme (str): The restriction enzyme passed to the primer designer (Golden Gate only).
+        max_attempts (int): How many UTR pairs to try before accepting the construct with the fewest new forbidden
+            sites; fewer are tried if the options run out first.
+    """
+    def __init__(self):
+        """
+        Initializes the GenePipeline without any loaded components.
+        """
+        self.utr_chooser = None
+        self.primer_designer = None
+        self.seq_checker = None
+
+    def initiate(self, utr_chooser=None):
+        """
+        Loads the UTR chooser and primer designer and sets the default cloning settings.
+
+        Parameters:
+            utr_chooser (UTRChooser): An initiated chooser to use as configured (e.g. loaded from a different genome);
+                if omitted, a new one is initiated with its result cache enabled.
+        """
+        if utr_chooser is None:
+            utr_chooser = UTRChooser()
+            utr_chooser.initiate()
+            utr_chooser.enable_result_cache()
+        self.utr_chooser = utr_chooser
+        self.primer_designer = PrimerDesigner()
+        self.primer_designer.initiate()
+        self.seq_checker = self.utr_chooser.seq_checker
+        self.method = "Gibson"
+        self.enzyme = None
+        self.max_attempts = 5
+
+    def run(self, cds, name="construct"):
+        """
+        Designs the UTRs, screens the construct and designs primers for a single CDS.
+
+        Parameters:
+            cds (str): The coding sequence.
+            name (str): The name of the construct, used for the ConstructionFile sequences.
+
+        Returns:
+            GeneDesign: The designed construct.
+        """
+        chooser = self.utr_chooser
+        chooser.validate_cds(cds)
+        first_six_aas = translate(cds[:18])
+        cds_sites = set(self.seq_checker.find_sites(cds))
+
+        # Retry with different UTRs while the UTRs or their junctions introduce forbidden sites, keeping the pair
+        # that introduces the fewest in case the options run out first
+        ignores = set()
+        best = None
+        for _ in range(self.max_attempts):
+            try:
+                utr5 = chooser.select(cds, 5, ignores, first_six_aas)
+                utr3 = chooser.select(cds, 3, ignores | {utr5}, first_six_aas)
+                if utr5 is None or utr3 is None:
+                    raise ValueError("No UTR options pass the forbidden sequence checks.")
+            except ValueError:
+                if best is None:
+                    raise
+                break
+            tail_start = len(utr3.utr) - chooser.poly_a_tail_length
+            screened = utr5.utr + cds + utr3.utr[:tail_start]
+            sites = self.seq_checker.find_sites(screened, reverse_complement(screened))
+            new_sites = len(set(sites) - cds_sites)
+            if best is None or new_sites < best[0]:
+                best = (new_sites, utr5, utr3, sites)
+            if not new_sites:
+                break
+            ignores |= {utr5, UTROption(utr3.utr[:tail_start], utr3.cds, utr3.gene_name, utr3.first_six_aas)}
+        _, utr5, utr3, sites = best
+
+        construct = utr5.utr + cds + utr3.utr
+        primers = self.primer_designer.run(cds, utr5.utr, utr3.utr, self.enzyme, self.method)
+        product = pcr(primers["forward_primer"], primers["reverse_primer"], Product(construct))
+        construction_file = ConstructionFile(
+            [PCR(f"{name}_F", f"{name}_R", name, f"{name}_pcr", product_size=product.size)],
+            {f"{name}_F": primers["forward_primer"], f"{name}_R": primers["reverse_primer"], name: construct},
+        )
+        return GeneDesign(name, cds, utr5, utr3, construct, primers, sites, construction_file)
+
+    def run_many(self, records, workers=1, chunksize=16):
+        """
+        Streams (name, cds) records through the pipeline, optionally across worker processes.
+
+        Each worker receives a copy of this initiated pipeline, so the UTR options are loaded once per worker
+        rather than once per record. Only a bounded number of chunks is in flight at a time, so arbitrarily
+        long inputs are processed in bounded memory.
+
+        Parameters:
+            records (iterable): (name, cds) pairs.
+            workers (int): Number of worker processes; 1 runs in this process.
+            chunksize (int): Number of records sent to a worker at a time.
+
+        Yields:
+            tuple: (name, GeneDesign or None, error message or None) for each record, in input order.
+        """
+        records = iter(records)
+        if workers <= 1:
+            for chunk in iter(lambda: list(islice(records, chunksize)), []):
+                yield from _run_chunk(self, chunk)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as executor:
+            in_flight = deque()
+            for chunk in iter(lambda: list(islice(records, chunksize)), []):
+                in_flight.append(executor.submit(_run_chunk, None, chunk))
+                if len(in_flight) >= 2 * workers:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+
+_worker_pipeline = None
+
+def _init_worker(pipeline):
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+
+def _run_chunk(pipeline, chunk):
+    """
+    Runs a chunk of records, capturing per-record validation errors instead of failing the whole stream.
+    """
+    pipeline = pipeline or _worker_pipeline
+    results = []
+    for name, cds in chunk:
+        try:
+            results.append((name, pipeline.run(cds, name), None))
+        except ValueError as e:
+            results.append((name, None, str(e)))
+    return results
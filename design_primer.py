@@ -1,5 +1,5 @@
-from Bio.SeqUtils import MeltingTemp as mt
 from bio_functions import reverse_complement
+import instrumentation
 
 class PrimerDesigner:
     """
@@ -96,9 +96,12 @@ class PrimerDesigner:
         Returns:
         - str: Sequence adjusted to meet the Tm target.
         """
+        from Bio.SeqUtils import MeltingTemp as mt  # Imported on first use to keep module import cheap
+
         length = self.primer_length
         while length < len(sequence):
             tm = mt.Tm_NN(sequence[:length])
+            instrumentation.count("PrimerDesigner.tm_evaluations")
             if tm >= self.tm_target:
                 return sequence[:length]
             length += 1
@@ -123,26 +126,27 @@ class PrimerDesigner:
             raise ValueError("Invalid region type. Use 'upstream' or 'downstream'.")
         return homology + primer_core
 
-# Example usage:
-# Golden Gate
-golden_gate_designer = PrimerDesigner()
-golden_gate_designer.initiate()
-primers_golden_gate = golden_gate_designer.run(
-    cds="ATGACCTGACTGA",
-    utr5="TTTAAA",
-    utr3="TTTCCC",
-    enzyme="BsaI",
-    method="Golden Gate"
-)
-print("Golden Gate Primers:", primers_golden_gate)
-
-# Gibson Assembly
-gibson_designer = PrimerDesigner()
-gibson_designer.initiate()
-primers_gibson = gibson_designer.run(
-    cds="ATGACCTGACTGA",
-    utr5="TTTAAA",
-    utr3="TTTCCC",
-    method="Gibson"
-)
-print("Gibson Assembly Primers:", primers_gibson)
+if __name__ == "__main__":
+    # Example usage:
+    # Golden Gate
+    golden_gate_designer = PrimerDesigner()
+    golden_gate_designer.initiate()
+    primers_golden_gate = golden_gate_designer.run(
+        cds="ATGACCTGACTGA",
+        utr5="TTTAAA",
+        utr3="TTTCCC",
+        enzyme="BsaI",
+        method="Golden Gate"
+    )
+    print("Golden Gate Primers:", primers_golden_gate)
+
+    # Gibson Assembly
+    gibson_designer = PrimerDesigner()
+    gibson_designer.initiate()
+    primers_gibson = gibson_designer.run(
+        cds="ATGACCTGACTGA",
+        utr5="TTTAAA",
+        utr3="TTTCCC",
+        method="Gibson"
+    )
+    print("Gibson Assembly Primers:", primers_gibson)
@@ -1,7 +1,14 @@
 from genome_data_parsing import *
 from bio_functions import *
-from dataclasses import dataclass
+from codon_optimizer import build_codon_usage
+from folding import fold_window, mfe_many
+from sequence_store import SequenceStore
+from result_cache import ResultCache
+from dataclasses import dataclass, asdict, astuple
+import hashlib
+import json
 import random
+import instrumentation
 from checkers.forbidden_sequence_checker import ForbiddenSequenceChecker
 
 @dataclass(frozen=True)
@@ -20,6 +27,160 @@ class UTROption:
     gene_name: str
     first_six_aas: str
 
+def _option_to_json(utr_option):
+    return None if utr_option is None else asdict(utr_option)
+
+def _option_from_json(data):
+    return None if data is None else UTROption(**data)
+
+class OptionTable:
+    """
+    Per-option columns derived from a UTRChooser's settings, recomputed only when the settings they depend on change.
+
+    Each column records the settings it was computed from. When a column is read and its settings have changed, only
+    that column is rebuilt, so adjusting one design rule on a loaded chooser does not redo the work for the others.
+    The forbidden site column is updated incrementally: only sites added since the last scan are searched for, and
+    removed sites are dropped from the results. With mismatch budgets set on the checker, the column is rebuilt with
+    its approximate search instead.
+
+    Columns:
+        forbidden_sites: UTROption -> set of the chooser's forbidden sites present in its UTR (either strand).
+        kozak_mismatches: UTROption -> [conserved?, ...] for each Kozak mismatch in the last six bases of its UTR,
+            or None for UTRs shorter than six bases.
+        mfe: UTROption -> folding energy of its UTR with the start of its own CDS. Only built by refresh under the
+            "mfe" structure model.
+        poly_a: UTROption -> the option with the poly-A tail appended, as returned for a 3' UTR.
+    """
+    COLUMNS = ('forbidden_sites', 'kozak_mismatches', 'mfe', 'poly_a')
+
+    def __init__(self, chooser):
+        """
+        Parameters:
+            chooser (UTRChooser): The chooser whose options and settings the columns are derived from.
+        """
+        self.chooser = chooser
+        self.columns = {}
+        self.snapshots = {}
+        self._scan_text = {}
+        self._fingerprint = None
+
+    def get(self, column):
+        """
+        Returns a column, recomputing it first if the options or the settings it depends on have changed.
+
+        Parameters:
+            column (str): The column name.
+
+        Returns:
+            dict: UTROption -> value.
+        """
+        options = self.chooser.utrOptions
+        settings = getattr(self, f"_settings_{column}")()
+        previous = self.snapshots.get(column)
+        # Options are compared by content (identical options short-circuit), so in-place replacements are caught
+        same_options = previous is not None and previous[0] == options
+        if same_options and previous[1] == settings:
+            return self.columns[column]
+        with instrumentation.stage(f"OptionTable.{column}"):
+            if column == 'forbidden_sites' and same_options and not previous[1][1] and not settings[1]:
+                self._update_sites(previous[1][0], settings[0])
+            else:
+                instrumentation.count(f"OptionTable.rebuilt.{column}")
+                getattr(self, f"_build_{column}")(options)
+        self.snapshots[column] = (list(options), settings)
+        return self.columns[column]
+
+    def refresh(self):
+        """
+        Brings every column up to date.
+        """
+        for column in self.COLUMNS:
+            # Folding every option is slow, so the energies are only computed when the chooser scores by them
+            if column != 'mfe' or self.chooser.structure_model == "mfe":
+                self.get(column)
+
+    def fingerprint(self):
+        """
+        Returns:
+            str: A digest of the loaded options' contents, recomputed only when the options change.
+        """
+        options = self.chooser.utrOptions
+        if self._fingerprint is None or self._fingerprint[0] != options:
+            digest = hashlib.sha1()
+            for option in options:
+                digest.update(json.dumps(astuple(option)).encode('utf-8'))
+            self._fingerprint = (list(options), digest.hexdigest())
+        return self._fingerprint[1]
+
+    # The settings each column depends on; methods rather than lambdas so the table (and its chooser) can be pickled
+    def _settings_forbidden_sites(self):
+        seq_checker = self.chooser.seq_checker
+        return tuple(seq_checker.forbidden), tuple(sorted(seq_checker.mismatches.items()))
+
+    def _settings_kozak_mismatches(self):
+        return self.chooser.kozak_seq
+
+    def _settings_mfe(self):
+        return self.chooser.fold_downstream, self.chooser.initiation_window
+
+    def _settings_poly_a(self):
+        return self.chooser.poly_a_tail_length
+
+    def _build_forbidden_sites(self, options):
+        seq_checker = self.chooser.seq_checker
+        if seq_checker.mismatches:
+            self.columns['forbidden_sites'] = {option: set(seq_checker.find_sites(option.utr)) for option in options}
+            return
+        self._scan_text = {option: (option.utr + "x" + reverse_complement(option.utr)).upper() for option in options}
+        self.columns['forbidden_sites'] = {option: set() for option in options}
+        self._update_sites((), tuple(self.chooser.seq_checker.forbidden))
+
+    def _update_sites(self, previous, current):
+        added = [site for site in dict.fromkeys(current) if site not in previous]
+        removed = set(previous) - set(current)
+        instrumentation.count("OptionTable.sites_scanned", len(added) * len(self._scan_text))
+        for option, sites in self.columns['forbidden_sites'].items():
+            sites -= removed
+            text = self._scan_text[option]
+            sites.update(site for site in added if site.upper() in text)
+
+    def _build_kozak_mismatches(self, options):
+        kozak_seq = self.chooser.kozak_seq
+        self.columns['kozak_mismatches'] = {
+            option: kozak_mismatches(kozak_seq, option.utr[-6:]) if len(option.utr) >= 6 else None
+            for option in options
+        }
+
+    def _build_mfe(self, options):
+        energies = mfe_many(self.chooser.fold_window(option.utr, option.cds) for option in options)
+        self.columns['mfe'] = dict(zip(options, energies))
+
+    def _build_poly_a(self, options):
+        tail = 'A' * self.chooser.poly_a_tail_length
+        self.columns['poly_a'] = {
+            option: UTROption(utr=option.utr + tail, cds=option.cds, gene_name=option.gene_name, first_six_aas=option.first_six_aas)
+            for option in options
+        }
+
+def kozak_mismatches(kozak_seq, seq, start=0):
+    """
+    Lists the mismatches between a sequence and part of a Kozak pattern.
+
+    Parameters:
+        kozak_seq (str): The Kozak pattern; uppercase bases are conserved, lowercase bases are preferred.
+        seq (str): The sequence aligned to the pattern from position start.
+        start (int): The position in the pattern the sequence starts at.
+
+    Returns:
+        list: For each mismatching base in order, True if the pattern base is conserved, False otherwise.
+    """
+    mismatches = []
+    for x in range(len(seq)):
+        expected = kozak_seq[start + x]
+        if expected.upper() != seq[x]:
+            mismatches.append(expected.isupper())
+    return mismatches
+
 class UTRChooser:
     """
     A class to select the optimal UTR sequence for a given coding sequence (CDS) based on translation
@@ -29,18 +190,45 @@ class UTRChooser:
         kozak_seq (str): A canonical Kozak sequence used for ensuring proper translation initiation.
         ends (list): A list of valid UTR ends (3' or 5').
         poly_a_tail_length (int): The length of the poly-A tail for the 3' UTR.
+        genbank_file (str): The GenBank file UTR and CDS sequences are extracted from.
+        sequence_store (str): A packed sequence store (see sequence_store.py) to read them from instead, or None.
+        utr_length (int): Number of bases upstream of each source gene's start codon used as its UTR.
+        clip_utrs (bool): Clip each UTR to the intergenic space before the neighbouring locus; genes left without
+            any UTR are skipped.
+        proteomics_file (str): The proteomics abundance file used to pick the top-performing genes.
         utrOptions (list): A list of UTROption instances derived from genomic data.
         seq_checker (ForbiddenSequenceChecker): A sequence checker to validate UTR sequences.
+        codon_usage (dict): Codon usage of the top-performing genes' CDSs, as built by build_codon_usage.
+        initiation_window (tuple): (bases upstream, bases downstream) of the start codon scored for structure, or
+            None to score the whole UTR + CDS for hairpins, or the whole UTR + fold_downstream CDS bases for folding.
+        structure_model (str): "hairpins" to penalise options by their hairpin count, or "mfe" to penalise them by
+            the folding energy of the UTR and the start of the CDS (more accurate, but slower).
+        fold_downstream (int): Number of CDS bases folded together with the UTR when initiation_window is None.
+        result_cache (ResultCache): Results of run by cache_key, or None (the default) to select every time; see
+            enable_result_cache.
+        option_table (OptionTable): Per-option values derived from the settings above, computed at initiate and
+            recomputed column by column when the settings they depend on change.
     """
     def __init__(self):
         """
         Initializes the UTRChooser with default settings for Kozak sequence, valid UTR ends, and poly-A tail length.
         """
         self.utrOptions = []
+        self.codon_usage = {}
         self.kozak_seq = 'aAaAaAATGTCt'
         self.ends = [3, 5]
         random.seed(1738)
         self.poly_a_tail_length = 15  # Default length of poly-A tail
+        self.genbank_file = 'data/genomic.gbff'
+        self.sequence_store = None
+        self.utr_length = 50
+        self.clip_utrs = False
+        self.proteomics_file = 'data/4932-WHOLE_ORGANISM-integrated.txt'
+        self.initiation_window = None
+        self.structure_model = "hairpins"
+        self.fold_downstream = 30
+        self.option_table = OptionTable(self)
+        self.result_cache = None
     
     def initiate(self):
         """
@@ -49,10 +237,14 @@ class UTRChooser:
         """
         self.seq_checker = ForbiddenSequenceChecker()
         self.seq_checker.initiate()
-        genbank = 'data/genomic.gbff'
-        genes_info = extract_genes_info(genbank)
-        file_path = 'data/4932-WHOLE_ORGANISM-integrated.txt'
-        top_5_percent_list = proteomics_prune(file_path)
+        with instrumentation.stage("UTRChooser.initiate.extract_genes_info"):
+            if self.sequence_store:
+                with SequenceStore(self.sequence_store) as store:
+                    genes_info = store.genes_info(self.utr_length, self.clip_utrs)
+            else:
+                genes_info = extract_genes_info(self.genbank_file, self.utr_length, self.clip_utrs)
+        with instrumentation.stage("UTRChooser.initiate.proteomics_prune"):
+            top_5_percent_list = proteomics_prune(self.proteomics_file)
 
         for locus_tag, abundance in top_5_percent_list:
             if locus_tag in genes_info:
@@ -62,6 +254,9 @@ class UTRChooser:
                 cds = gene_info['CDS']
                 gene_name = gene_info['gene']
 
+                if not utr and self.clip_utrs:
+                    continue  # The gene overlaps its upstream neighbour
+
                 if not utr or not cds:
                     raise ValueError(f"Missing UTR or CDS for gene {gene_name} with locus tag {locus_tag}.")
 
@@ -82,6 +277,10 @@ class UTRChooser:
                 )
                 self.utrOptions.append(utr_option)
 
+        self.codon_usage = build_codon_usage(option.cds for option in self.utrOptions)
+        with instrumentation.stage("UTRChooser.initiate.option_table"):
+            self.option_table.refresh()
+
     def run(self, cds, end, ignores = set()):
         """
         Selects the best UTR option for a given coding sequence (CDS) based on scoring criteria.
@@ -96,6 +295,45 @@ class UTRChooser:
         """
         if end not in self.ends:
             raise ValueError("End must be 3 or 5 to signify 3' or 5' UTR.")
+        self.validate_cds(cds)
+        with instrumentation.stage("UTRChooser.run"):
+            return self.select(cds, end, ignores)
+
+    def cache_key(self, cds, end, ignores = set()):
+        """
+        Builds the result cache key of a query from everything the result of run depends on: the start of the CDS
+        (the first six amino acids, the Kozak bases and, for a folded 5' UTR, the folded CDS bases), the end, the
+        ignored options, the loaded options and the design settings.
+
+        Parameters:
+            cds (str): The validated coding sequence.
+            end (int): Specifies 5' or 3' UTR (use 5 or 3).
+            ignores (set): A set of UTROption instances to exclude from selection.
+
+        Returns:
+            str: The cache key.
+        """
+        prefix = 18
+        if end == 5 and self.structure_model == "mfe":
+            prefix = max(prefix, len(self.fold_window("", cds)))
+        forbidden = self.seq_checker.forbidden if hasattr(self, 'seq_checker') else []
+        mismatches = self.seq_checker.mismatches if hasattr(self, 'seq_checker') else {}
+        return json.dumps([
+            cds[:prefix], end, sorted(astuple(option) for option in ignores), self.option_table.fingerprint(),
+            self.kozak_seq, list(forbidden), sorted(mismatches.items()), self.poly_a_tail_length,
+            self.structure_model, self.fold_downstream, self.initiation_window,
+        ])
+
+    def validate_cds(self, cds):
+        """
+        Validates a coding sequence before UTR selection.
+
+        Parameters:
+            cds (str): The coding sequence for which the UTR is being chosen.
+
+        Raises:
+            ValueError: If the CDS is empty, contains invalid characters, is not a multiple of 3 or is too short.
+        """
         if not cds:
             raise ValueError("CDS sequence cannot be empty.")
         if not all(base in 'ATCG' for base in cds):
@@ -104,6 +342,44 @@ class UTRChooser:
             raise ValueError("CDS sequence length must be a multiple of 3.")
         if len(cds) < 18:
             raise ValueError("CDS sequence is too short to translate the first six amino acids.")
+
+    def enable_result_cache(self, maxsize=4096, ttl=None, path=None):
+        """
+        Caches the results of run by cache_key. The Kozak check accepts near-matches at random, so a cached query
+        returns the outcome of its first draw instead of drawing again; callers that answer many repeated queries
+        (the pipeline, the command line driver and the service) turn it on.
+
+        Parameters:
+            maxsize (int): Maximum number of results kept in memory.
+            ttl (float): Seconds a result stays valid, or None to keep results until evicted.
+            path (str): A SQLite file to share results across processes and runs, or None.
+        """
+        self.result_cache = ResultCache(maxsize, ttl, path, encode=_option_to_json, decode=_option_from_json)
+
+    def select(self, cds, end, ignores = set(), input_first_six_aas = None):
+        """
+        Selects the best UTR option for a CDS that has already passed validate_cds, using result_cache if set.
+
+        Parameters:
+            cds (str): The validated coding sequence.
+            end (int): Specifies 5' or 3' UTR (use 5 or 3).
+            ignores (set): A set of UTROption instances to exclude from selection.
+            input_first_six_aas (str): The first six amino acids of the CDS, if already translated.
+
+        Returns:
+            UTROption: The best UTR option for the given CDS.
+        """
+        if self.result_cache is None:
+            return self._select(cds, end, ignores, input_first_six_aas)
+        key = self.cache_key(cds, end, ignores)
+        found, utr_option = self.result_cache.get(key)
+        if not found:
+            utr_option = self._select(cds, end, ignores, input_first_six_aas)
+            self.result_cache.put(key, utr_option)
+        return utr_option
+
+    def _select(self, cds, end, ignores, input_first_six_aas):
+        # The uncached selection behind select
         if not self.utrOptions:
             raise ValueError("No UTR options are available to choose from.")
         
@@ -111,67 +387,157 @@ class UTRChooser:
         if not valid_utr_options:
             raise ValueError("No valid UTR options remain after applying the ignore filter.")
 
-        input_first_six_aas = translate(cds[:18])  # First 6 amino acids from the CDS
-        best_utr = None
-        best_score = float('inf')
-
+        if input_first_six_aas is None:
+            input_first_six_aas = translate(cds[:18])  # First 6 amino acids from the CDS
         kozak_compliant_found = False
+        instrumentation.count("UTRChooser.options_scanned", len(valid_utr_options))
+        option_kozak_mismatches = self.option_table.get('kozak_mismatches')
+        option_sites = self.option_table.get('forbidden_sites')
 
+        candidates = []  # (edit distance, option) of the options passing the filters, in option order
         for utr_option in valid_utr_options:
             if end == 5:
-                is_kozak_compliant = self.ensure_kozak(utr_option, cds)
+                with instrumentation.stage("UTRChooser.kozak"):
+                    is_kozak_compliant = self.ensure_kozak(utr_option, cds, option_kozak_mismatches[utr_option])
                 kozak_compliant_found = kozak_compliant_found or is_kozak_compliant
                 if not is_kozak_compliant:
+                    instrumentation.count("UTRChooser.rejected_kozak")
                     continue  # Skip options that do not meet Kozak sequence criteria
-            if not self.forbidden_seq_check(utr_option):
+            if option_sites[utr_option]:
+                instrumentation.count("UTRChooser.rejected_forbidden")
                 continue  # Skip options failing forbidden sequence checks
 
-            edit_distance = calculate_edit_distance(input_first_six_aas, utr_option.first_six_aas)
-            hairpin_count = hairpin_counter(utr_option.utr + utr_option.cds)[0]
-
-            # Weighted scoring: edit distance has higher priority
-            score = (edit_distance * 1000) + hairpin_count
-
-            if score < best_score:
-                best_score = score
-                best_utr = utr_option
+            with instrumentation.stage("UTRChooser.edit_distance"):
+                edit_distance = calculate_edit_distance(input_first_six_aas, utr_option.first_six_aas)
+            candidates.append((edit_distance, utr_option))
 
         if end == 5 and not kozak_compliant_found:
             raise ValueError("No Kozak-compliant UTR options found.")
 
+        # Weighted scoring: edit distance has higher priority. Options are scored one edit distance at a time, from the
+        # closest, so their structure is evaluated together; the structure penalty is never negative, so once a score
+        # is below distance * 1000 no option further away can win.
+        scores = {}
+        best_score = float('inf')
+        for distance in sorted({edit_distance for edit_distance, _ in candidates}):
+            if distance * 1000 > best_score:
+                break
+            group = [utr_option for edit_distance, utr_option in candidates if edit_distance == distance]
+            with instrumentation.stage("UTRChooser.structure"):
+                penalties = self.structure_penalties(group, cds, end)
+            for utr_option, structure_penalty in zip(group, penalties):
+                scores[utr_option] = (distance * 1000) + structure_penalty
+                best_score = min(best_score, scores[utr_option])
+        # The first option (in option order) with the best score
+        best_utr = next((utr_option for _, utr_option in candidates if scores.get(utr_option) == best_score), None)
+
         if end == 3 and best_utr:
-        # Append poly-A tail for 3' UTR by creating a new UTROption
-            best_utr = UTROption(
-            utr=best_utr.utr + 'A' * self.poly_a_tail_length,  # Append poly-A tail
-            cds=best_utr.cds,
-            gene_name=best_utr.gene_name,
-            first_six_aas=best_utr.first_six_aas
-        )
+            best_utr = self.option_table.get('poly_a')[best_utr]  # The option with its poly-A tail appended
 
         return best_utr
     
-    def ensure_kozak(self, utr_option, cds):
+    def ensure_kozak(self, utr_option, cds, utr_mismatches=None):
         """
         Ensures the UTR sequence ends with a Kozak-like sequence before the start codon.
 
         Parameters:
             utr_option (UTROption): The UTR option to validate.
             cds (str): The coding sequence.
+            utr_mismatches (list): The option's precomputed Kozak mismatches (see OptionTable), if available.
 
         Returns:
             bool: True if the UTR contains a valid Kozak sequence, False otherwise.
         """
         utr = utr_option.utr[-6:]
-        seq = utr + cds[:6]
+        if utr_mismatches is None:
+            utr_mismatches = kozak_mismatches(self.kozak_seq, utr)
+        mismatches = utr_mismatches + kozak_mismatches(self.kozak_seq, cds[:6], len(utr))
 
-        for x in range(len(seq)):
-            if self.kozak_seq[x].isupper() and self.kozak_seq[x] != seq[x]:
+        for conserved in mismatches:
+            if conserved:
                 return False  # Highly conserved region mismatch
-            if self.kozak_seq[x].islower() and self.kozak_seq[x].upper() != seq[x]:
-                if random.random() > 0.3:  # Less conserved region with chance to pass
-                    return False
+            if random.random() > 0.3:  # Less conserved region with chance to pass
+                return False
         return True
     
+    def structure_penalty(self, utr_option, cds, end):
+        """
+        Penalises secondary structure of a UTR option according to structure_model.
+
+        With the "mfe" model, a 5' UTR is folded together with the start of the query CDS, since that is the region
+        the ribosome scans; a 3' UTR uses the energy precomputed for its source gene at initiate.
+
+        Parameters:
+            utr_option (UTROption): The UTR option to score.
+            cds (str): The query coding sequence.
+            end (int): Specifies 5' or 3' UTR (use 5 or 3).
+
+        Returns:
+            float: A non-negative penalty; more structure gives a larger penalty.
+        """
+        return self.structure_penalties([utr_option], cds, end)[0]
+
+    def structure_penalties(self, utr_options, cds, end):
+        """
+        Penalises secondary structure of several UTR options at once (see structure_penalty); under the "mfe" model
+        their windows are folded together.
+
+        Parameters:
+            utr_options (list): The UTR options to score.
+            cds (str): The query coding sequence.
+            end (int): Specifies 5' or 3' UTR (use 5 or 3).
+
+        Returns:
+            list: The penalty of each option, in order.
+        """
+        if self.structure_model == "hairpins":
+            return [self.hairpin_score(utr_option) for utr_option in utr_options]
+        if self.structure_model != "mfe":
+            raise ValueError("Structure model must be 'mfe' or 'hairpins'.")
+        if end == 5:
+            return [-energy for energy in mfe_many(self.fold_window(utr_option.utr, cds) for utr_option in utr_options)]
+        option_energies = self.option_table.get('mfe')
+        # Options that were not loaded are folded with their own CDS, as at initiate
+        missing = [utr_option for utr_option in utr_options if utr_option not in option_energies]
+        folded = dict(zip(missing, mfe_many(self.fold_window(utr_option.utr, utr_option.cds) for utr_option in missing)))
+        return [-(option_energies[utr_option] if utr_option in option_energies else folded[utr_option])
+                for utr_option in utr_options]
+
+    def fold_window(self, utr, cds):
+        """
+        Returns the region folded by the "mfe" structure model: the initiation window if one is set, otherwise the
+        whole UTR and the first fold_downstream bases of the CDS.
+
+        Parameters:
+            utr (str): The UTR.
+            cds (str): The coding sequence following it.
+
+        Returns:
+            str: The sequence to fold.
+        """
+        if self.initiation_window is None:
+            return fold_window(utr, cds, self.fold_downstream)
+        upstream, downstream = self.initiation_window
+        return fold_window(utr, cds, downstream, upstream)
+
+    def hairpin_score(self, utr_option):
+        """
+        Counts the hairpins in the UTR + CDS of an option, limited to the initiation region if one is set.
+
+        Parameters:
+            utr_option (UTROption): The UTR option to score.
+
+        Returns:
+            int: The number of hairpins.
+        """
+        sequence = utr_option.utr + utr_option.cds
+        if self.initiation_window is None:
+            return hairpin_counter(sequence)[0]
+        upstream, downstream = self.initiation_window
+        start_codon = len(utr_option.utr)
+        region = sequence[max(0, start_codon - upstream):start_codon + downstream]
+        return hairpin_counter(region)[0]
+
     def forbidden_seq_check(self, utr_option):
         """
         Validates the UTR sequence against forbidden sequence checks.
@@ -0,0 +1,269 @@
+"""
+Minimum free energy (MFE) folding of short DNA windows, e.g. a 5' UTR plus the start of its CDS.
+
+This is a Zuker-style dynamic programme over a simplified nearest-neighbour model: Watson-Crick stacking
+energies (SantaLucia & Hicks 2004, 37 C), length-dependent hairpin, bulge and interior loop penalties, a
+terminal A-T penalty and a linear multiloop penalty. Dangling ends, terminal mismatches and special loops are
+not modelled, so energies are estimates suited to ranking sequences rather than absolute predictions.
+
+The recursions are vectorised with NumPy over anti-diagonals and over batches of windows of the same length, and
+energies are memoised by window sequence.
+"""
+import math
+from functools import lru_cache
+from result_cache import ResultCache
+
+# Stacking free energy (kcal/mol) of a 5'-XY-3' dinucleotide paired with its complement
+STACK_ENERGY = {
+    'AA': -1.00, 'TT': -1.00, 'AT': -0.88, 'TA': -0.58,
+    'CA': -1.45, 'TG': -1.45, 'GT': -1.44, 'AC': -1.44,
+    'CT': -1.28, 'AG': -1.28, 'GA': -1.30, 'TC': -1.30,
+    'CG': -2.17, 'GC': -2.24, 'GG': -1.84, 'CC': -1.84,
+}
+HAIRPIN_ENERGY = {3: 3.5, 4: 3.5, 5: 3.3, 6: 4.0, 7: 4.2, 8: 4.3, 9: 4.5}
+BULGE_ENERGY = {1: 4.0, 2: 2.9, 3: 3.1, 4: 3.2, 5: 3.3, 6: 3.5}
+INTERIOR_ENERGY = {2: 0.5, 3: 1.6, 4: 1.1, 5: 2.0, 6: 2.0}
+TERMINAL_AT_PENALTY = 0.05
+ASYMMETRY_PENALTY = 0.3
+MULTILOOP_CLOSING = 3.4
+MULTILOOP_BRANCH = 0.4
+MULTILOOP_UNPAIRED = 0.0
+MIN_HAIRPIN_LOOP = 3
+MAX_INTERIOR_LOOP = 20
+
+PAIRS = {('A', 'T'), ('T', 'A'), ('G', 'C'), ('C', 'G')}
+# No loop closed by a pair can be more stable than the most stable stack
+MIN_LOOP_ENERGY = min(STACK_ENERGY.values())
+
+def _loop_extrapolation(table, length):
+    # Jacobson-Stockmayer extrapolation beyond the tabulated loop lengths
+    largest = max(table)
+    if length <= largest:
+        return table[length]
+    return table[largest] + 1.08 * math.log(length / largest)
+
+# Bulge and interior loop energies by loop size, up to the largest loop considered
+_BULGE = [None] + [_loop_extrapolation(BULGE_ENERGY, size) for size in range(1, MAX_INTERIOR_LOOP + 1)]
+_INTERIOR = [None, None] + [_loop_extrapolation(INTERIOR_ENERGY, size) for size in range(2, MAX_INTERIOR_LOOP + 1)]
+
+def _terminal_penalty(sequence, i, j):
+    return TERMINAL_AT_PENALTY if sequence[i] in 'AT' else 0.0
+
+def hairpin_energy(sequence, i, j):
+    """
+    Returns:
+        float: The free energy of the hairpin loop closed by the pair (i, j).
+    """
+    return _loop_extrapolation(HAIRPIN_ENERGY, j - i - 1) + _terminal_penalty(sequence, i, j)
+
+def interior_energy(sequence, i, j, k, l):
+    """
+    Returns:
+        float: The free energy of the stack, bulge or interior loop closed by the pair (i, j) with the inner
+        pair (k, l).
+    """
+    left, right = k - i - 1, j - l - 1
+    if left == 0 and right == 0:
+        return STACK_ENERGY[sequence[i] + sequence[k]]
+    if left == 0 or right == 0:
+        size = left + right
+        energy = _BULGE[size]
+        if size == 1:
+            # A single-base bulge keeps the helix stacked across it
+            return energy + STACK_ENERGY[sequence[i] + sequence[k]]
+        return energy + _terminal_penalty(sequence, i, j) + _terminal_penalty(sequence, k, l)
+    energy = _INTERIOR[left + right] + ASYMMETRY_PENALTY * abs(left - right)
+    return energy + _terminal_penalty(sequence, i, j) + _terminal_penalty(sequence, k, l)
+
+# Every (left, right) bulge or interior loop size pair considered, ordered by total loop size, with the energy
+# terms that depend only on the loop shape; see interior_energy for the model they implement
+_LOOPS = sorted(((left, right) for left in range(MAX_INTERIOR_LOOP + 1) for right in range(MAX_INTERIOR_LOOP + 1 - left)),
+                key=sum)
+_LOOP_LEFT = [left for left, _ in _LOOPS]
+_LOOP_RIGHT = [right for _, right in _LOOPS]
+_LOOP_ENERGY = [0.0 if left + right == 0 else _BULGE[left + right] if left == 0 or right == 0
+                else _INTERIOR[left + right] + ASYMMETRY_PENALTY * abs(left - right) for left, right in _LOOPS]
+# Stacks and single-base bulges add the stacking energy of the two pairs; other loops add terminal penalties
+_LOOP_STACKED = [left + right <= 1 for left, right in _LOOPS]
+# Number of loop shapes whose total size is at most the index
+_LOOPS_UP_TO = [sum(1 for loop in _LOOPS if sum(loop) <= size) for size in range(MAX_INTERIOR_LOOP + 1)]
+_BASES = 'ACGT'
+
+@lru_cache(maxsize=1)
+def _energy_tables():
+    """
+    Returns:
+        tuple: NumPy arrays of the loop shape energies, whether each loop shape is stacked, the stacking energy of
+        each pair of base codes (A, C, G, T = 0..3) and whether each pair of base codes can pair.
+    """
+    import numpy as np
+
+    return (
+        np.array(_LOOP_ENERGY),
+        np.array(_LOOP_STACKED),
+        np.array([[STACK_ENERGY[a + b] for b in _BASES] for a in _BASES]),
+        np.array([[(a, b) in PAIRS for b in _BASES] for a in _BASES]),
+    )
+
+@lru_cache(maxsize=128)
+def _fold_indices(n):
+    """
+    Index arrays for folding a sequence of length n, which do not depend on the sequence itself.
+
+    Returns:
+        tuple: (loop_index, inner, splits), where loop_index[i, loop] + span is the flat index of the inner pair
+        of each loop shape closed by (i, i + span), inner[i, loop] is the position of its 5' base, and splits[span]
+        is the pair of flat index arrays (i, u) and (u + 1, i + span) for every split point u of every cell.
+    """
+    import numpy as np
+
+    positions = np.arange(n)[:, None]
+    left, right = np.array(_LOOP_LEFT), np.array(_LOOP_RIGHT)
+    loop_index = (positions + 1 + left) * n + positions - 1 - right
+    inner = np.minimum(positions + 1 + left, n - 1)
+    splits = {}
+    for span in range(MIN_HAIRPIN_LOOP + 1, n):
+        i = np.arange(n - span)[:, None]
+        split = np.arange(span)[None, :]
+        splits[span] = (i * n + i + split, (i + split + 1) * n + i + span)
+    return loop_index, inner, splits
+
+# Folding energies by window sequence, shared by mfe and mfe_many
+FOLD_CACHE = ResultCache(maxsize=65536)
+
+def mfe(sequence):
+    """
+    Computes the minimum free energy of a DNA sequence folding on itself.
+
+    Results are memoised by sequence in FOLD_CACHE, so scoring the same window again (e.g. the same UTR in front of
+    the same CDS start) is a dictionary lookup. Use mfe_many to fold many windows at once.
+
+    Parameters:
+        sequence (str): The DNA sequence to fold (A, T, C, G).
+
+    Returns:
+        float: The minimum free energy in kcal/mol; 0.0 when no structure is more stable than the unfolded strand.
+    """
+    return mfe_many([sequence])[0]
+
+def mfe_many(sequences):
+    """
+    Computes the minimum free energy of each of many DNA sequences.
+
+    Sequences that are not memoised yet are folded together, one batch per sequence length, which is much faster
+    than folding them one by one.
+
+    Parameters:
+        sequences (iterable): The DNA sequences to fold (A, T, C, G).
+
+    Returns:
+        list: The minimum free energy of each sequence in kcal/mol, in order.
+    """
+    sequences = list(sequences)
+    energies = {}
+    by_length = {}
+    for sequence in dict.fromkeys(sequences):
+        if any(base not in 'ATCG' for base in sequence):
+            raise ValueError("DNA sequence contains invalid characters. Allowed characters: A, T, C, G.")
+        found, energy = FOLD_CACHE.get(sequence)
+        if found:
+            energies[sequence] = energy
+        else:
+            by_length.setdefault(len(sequence), []).append(sequence)
+    for batch in by_length.values():
+        for sequence, energy in zip(batch, _fold(batch)):
+            FOLD_CACHE.put(sequence, energy)
+            energies[sequence] = energy
+    return [energies[sequence] for sequence in sequences]
+
+def _fold(sequences):
+    """
+    Folds sequences of the same length together.
+
+    The recursions are evaluated one anti-diagonal (span j - i) at a time with NumPy: every cell of a diagonal only
+    depends on shorter spans, so all pairs (i, j) of a span in every sequence, and all their inner loops, are scored
+    in a few array operations.
+
+    Parameters:
+        sequences (list): Validated DNA sequences, all of the same length.
+
+    Returns:
+        list: The minimum free energy of each sequence in kcal/mol.
+    """
+    import numpy as np
+
+    n = len(sequences[0])
+    if n < MIN_HAIRPIN_LOOP + 2:
+        return [0.0] * len(sequences)
+
+    loop_energies, loop_stacked, stacks, pairs = _energy_tables()
+    loop_index, inner, splits = _fold_indices(n)
+    codes = np.array([[_BASES.index(base) for base in sequence] for sequence in sequences])
+    batch = np.arange(len(sequences))[:, None, None]
+    positions = np.arange(n)[None, :, None]
+    terminal = np.where((codes == 0) | (codes == 3), TERMINAL_AT_PENALTY, 0.0)
+    # Energy of each loop shape closed by a pair starting at i, in each sequence
+    inner_codes = codes[batch, inner[None]]
+    loop_energy = loop_energies + np.where(
+        loop_stacked, stacks[codes[:, :, None], inner_codes],
+        terminal[:, :, None] + terminal[batch, inner[None]])
+    pairable = pairs[codes[:, :, None], codes[:, None, :]].reshape(len(sequences), n * n)
+
+    inf = float('inf')
+    # V[s, i * n + j]: best energy of i..j with i and j paired; WM: best energy of i..j as part of a multiloop;
+    # WS: best energy of i..j split into two multiloop parts (two or more branches)
+    V = np.full((len(sequences), n * n), inf)
+    WM = np.full((len(sequences), n * n), inf)
+    WS = np.full((len(sequences), n * n), inf)
+    flat = np.arange(n * n)
+    for span in range(MIN_HAIRPIN_LOOP + 1, n):
+        count = n - span
+        diagonal = flat[span:count * (n + 1):n + 1]
+        sequence, start = np.nonzero(pairable[:, diagonal])
+        if sequence.size:
+            cells = diagonal[start]
+            best = _loop_extrapolation(HAIRPIN_ENERGY, span - 1) + terminal[sequence, start]
+            if span >= MIN_HAIRPIN_LOOP + 3:
+                loops = _LOOPS_UP_TO[min(span - MIN_HAIRPIN_LOOP - 3, MAX_INTERIOR_LOOP)]
+                energies = V[sequence[:, None], loop_index[start, :loops] + span] + loop_energy[sequence, start, :loops]
+                best = np.minimum(best, energies.min(axis=1))
+            if span > 2 * MIN_HAIRPIN_LOOP + 3:
+                # Multiloop closed by (i, j): branches split anywhere in i + 1..j - 1
+                multiloop = WS[sequence, cells + n - 1] + MULTILOOP_CLOSING + MULTILOOP_BRANCH + terminal[sequence, start]
+                best = np.minimum(best, multiloop)
+            V[sequence, cells] = best
+
+        left, right = splits[span]
+        WS[:, diagonal] = (WM[:, left] + WM[:, right]).min(axis=2)
+        WM[:, diagonal] = np.minimum(
+            np.minimum(V[:, diagonal] + MULTILOOP_BRANCH + terminal[:, :count], WS[:, diagonal]),
+            np.minimum(WM[:, diagonal + n], WM[:, diagonal - 1]) + MULTILOOP_UNPAIRED,
+        )
+
+    # W[s, j]: best energy of the exterior loop over the prefix 0..j-1
+    exterior = V.reshape(len(sequences), n, n) + terminal[:, :, None]
+    W = np.zeros((len(sequences), n + 1))
+    for j in range(1, n + 1):
+        best = W[:, j - 1]
+        last = j - MIN_HAIRPIN_LOOP - 1
+        if last > 0:
+            best = np.minimum(best, (W[:, :last] + exterior[:, :last, j - 1]).min(axis=1))
+        W[:, j] = best
+    return [round(float(energy), 2) for energy in W[:, n]]
+
+def fold_window(utr, cds, downstream=30, upstream=None):
+    """
+    Returns the window around the start codon whose folding affects translation initiation.
+
+    Parameters:
+        utr (str): The 5' UTR.
+        cds (str): The coding sequence.
+        downstream (int): Number of CDS bases included after the start of the CDS.
+        upstream (int): Number of UTR bases included before the start codon, or None for the whole UTR.
+
+    Returns:
+        str: The (end of the) UTR followed by the first bases of the CDS.
+    """
+    if upstream is not None:
+        utr = utr[max(0, len(utr) - upstream):]
+    return utr + cds[:downstream]
@@ -1,35 +1,151 @@
 # Read and extract the relevant gene data
-from Bio import SeqIO
+# Biopython and pandas are imported inside the functions that need them, so importing this module stays cheap
+import bisect
 from collections import defaultdict
-import pandas as pd
+import instrumentation
+class IntervalIndex:
+    """
+    Sorted interval index of the loci on one contig, used to find the intergenic space next to a gene.
+
+    Intervals are kept sorted by start with a running maximum of their ends, and sorted by end with a running
+    minimum of their starts from the right, so each lookup is a binary search.
+    """
+    def __init__(self, intervals):
+        """
+        Parameters:
+            intervals (iterable): (start, end, name) tuples, 0-based and end-exclusive, with unique names.
+        """
+        self.by_start = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self.by_end = sorted(self.by_start, key=lambda interval: (interval[1], interval[0]))
+        self.starts = [interval[0] for interval in self.by_start]
+        self.ends = [interval[1] for interval in self.by_end]
+        self.start_rank = {interval[2]: rank for rank, interval in enumerate(self.by_start)}
+        self.end_rank = {interval[2]: rank for rank, interval in enumerate(self.by_end)}
+
+        # max_end[k]: largest end among the first k intervals by start
+        self.max_end = [None]
+        for _, end, _ in self.by_start:
+            self.max_end.append(end if self.max_end[-1] is None else max(self.max_end[-1], end))
+        # min_start[k]: smallest start among the intervals by end from rank k on
+        self.min_start = [None]
+        for start, _, _ in reversed(self.by_end):
+            self.min_start.append(start if self.min_start[-1] is None else min(self.min_start[-1], start))
+        self.min_start.reverse()
+
+    def upstream_limit(self, position, name=None):
+        """
+        Returns:
+            int: The end of the nearest other locus starting before position, capped at position, or 0 if none.
+        """
+        count = bisect.bisect_left(self.starts, position)
+        rank = self.start_rank.get(name)
+        if rank is None or rank >= count:
+            limit = self.max_end[count]
+        else:
+            # Skip the named interval itself
+            ends = [end for _, end, _ in self.by_start[rank + 1:count]]
+            limit = max([end for end in (self.max_end[rank], *ends) if end is not None], default=None)
+        return 0 if limit is None else min(limit, position)
+
+    def downstream_limit(self, position, length, name=None):
+        """
+        Returns:
+            int: The start of the nearest other locus ending after position, floored at position, or length if none.
+        """
+        first = bisect.bisect_right(self.ends, position)
+        rank = self.end_rank.get(name)
+        if rank is None or rank < first:
+            limit = self.min_start[first]
+        else:
+            # Skip the named interval itself
+            starts = [start for start, _, _ in self.by_end[first:rank]]
+            limit = min([start for start in (self.min_start[rank + 1], *starts) if start is not None], default=None)
+        return length if limit is None else max(limit, position)
+
+def locus_intervals(features):
+    """
+    Returns:
+        list: (start, end, locus tag) spanning all features of each locus tag.
+    """
+    spans = {}
+    for feature in features:
+        locus_tag = feature.qualifiers.get("locus_tag", [None])[0]
+        if locus_tag is None:
+            continue
+        start, end = int(feature.location.start), int(feature.location.end)
+        if locus_tag in spans:
+            start, end = min(start, spans[locus_tag][0]), max(end, spans[locus_tag][1])
+        spans[locus_tag] = (start, end)
+    return [(start, end, locus_tag) for locus_tag, (start, end) in spans.items()]
+
+def utr_window(start, end, strand, utr_length, contig_length, intervals=None, locus_tag=None):
+    """
+    Returns the coordinates of the region upstream of a CDS on its own strand.
+
+    Parameters:
+        start (int): Start of the CDS (0-based).
+        end (int): End of the CDS (exclusive).
+        strand (int): 1 for the forward strand; anything else is treated as the reverse strand.
+        utr_length (int): Maximum number of bases in the window.
+        contig_length (int): Length of the contig.
+        intervals (IntervalIndex): If given, the window is clipped to the intergenic space before the next locus.
+        locus_tag (str): The CDS's own locus, which does not clip its window.
+
+    Returns:
+        tuple: (window start, window end) on the forward strand.
+    """
+    if strand == 1:
+        limit = intervals.upstream_limit(start, locus_tag) if intervals else 0
+        return max(start - utr_length, limit, 0), start
+    limit = intervals.downstream_limit(end, contig_length, locus_tag) if intervals else contig_length
+    return end, min(end + utr_length, limit, contig_length)
+
 # Function to extract UTR, gene, and CDS information from the GenBank file
-def extract_genes_info(genbank_file):
+def extract_genes_info(genbank_file, utr_length=50, clip=False):
+    """
+    Extracts the upstream region, gene name and CDS of every gene with a CDS.
+
+    Parameters:
+        genbank_file (str): The GenBank file to parse.
+        utr_length (int): Number of bases upstream of each start codon.
+        clip (bool): Clip each upstream region to the intergenic space, so it never overlaps a neighbouring locus.
+
+    Returns:
+        dict: Locus tag -> {"gene", "UTR", "CDS"}.
+    """
+    from Bio import SeqIO
     gene_dict = defaultdict(dict)  # Dictionary to store gene info
     for record in SeqIO.parse(genbank_file, "genbank"):
+        instrumentation.count("extract_genes_info.records_parsed")
+        instrumentation.count("extract_genes_info.features_parsed", len(record.features))
+        intervals = IntervalIndex(locus_intervals(record.features)) if clip else None
+
+        # First CDS of each locus tag
+        cds_features = {}
+        for feature in record.features:
+            locus_tag = feature.qualifiers.get("locus_tag", [None])[0]
+            if feature.type == "CDS" and locus_tag is not None:
+                cds_features.setdefault(locus_tag, feature)
+
         for feature in record.features:
             if feature.type == "gene":
                 locus_tag = feature.qualifiers.get("locus_tag", [None])[0]
                 gene_name = feature.qualifiers.get("gene", [None])[0]
 
                 # CDS information
-                cds_feature = None
-                for cds in record.features:
-                    if cds.type == "CDS" and cds.qualifiers.get("locus_tag") == [locus_tag]:
-                        cds_feature = cds
-                        break
+                cds_feature = cds_features.get(locus_tag)
 
                 if cds_feature:
-                    start, end = cds_feature.location.start, cds_feature.location.end
+                    start, end = int(cds_feature.location.start), int(cds_feature.location.end)
                     strand = cds_feature.location.strand
-                    if strand == 1:  # Forward strand
-                        utr_start = max(0, start - 50)
-                        utr_seq = record.seq[utr_start:start]
-                    else:  # Reverse strand, we need to reverse complement
-                        utr_start = end
-                        utr_seq = record.seq[utr_start:utr_start + 50].reverse_complement()
+                    utr_start, utr_end = utr_window(start, end, strand, utr_length, len(record.seq), intervals, locus_tag)
+                    utr_seq = record.seq[utr_start:utr_end]
+                    if strand != 1:  # Reverse strand, we need to reverse complement
+                        utr_seq = utr_seq.reverse_complement()
 
                     cds_seq = cds_feature.extract(record.seq)
                     # Save the gene information in the dictionary
+                    instrumentation.count("extract_genes_info.genes_extracted")
                     gene_dict[locus_tag] = {
                         "gene": gene_name,
                         "UTR": utr_seq,
@@ -38,6 +154,7 @@ def extract_genes_info(genbank_file):
     return gene_dict
 
 def proteomics_prune(file_path):
+    import pandas as pd
     proteomics_data = pd.read_csv(file_path, sep="\t", names=["string_external_id", "abundance"])
 
     # Convert the abundance column to numeric, coerce errors (for any non-numeric values)
@@ -0,0 +1,187 @@
+"""
+Opt-in instrumentation for the design modules.
+
+Instrumented code calls ``stage(name)`` around hot-path sections and ``count(name)`` for events. While
+instrumentation is disabled (the default) ``stage`` returns a shared no-op context manager and ``count``
+returns immediately, so the cost is a function call per site. Enable it with ``enable()``, the ``profile()``
+context manager, or by setting the DESIGN_INSTRUMENTATION environment variable to 1.
+
+Example:
+    import instrumentation
+    with instrumentation.profile("utr.prof"):
+        chooser.run(cds, 5)
+    print(instrumentation.dumps())
+"""
+import contextlib
+import json
+import os
+import time
+
+enabled = False
+
+class Recorder:
+    """
+    Collects stage timings and counters.
+
+    Attributes:
+        stages (dict): Stage name -> [calls, total seconds, max seconds].
+        counters (dict): Counter name -> value.
+        listeners (list): Callables notified as listener(name, start, duration) when a stage finishes,
+            e.g. to forward stages to a tracing system.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.listeners = []
+
+    def add_time(self, name, start, duration):
+        stats = self.stages.get(name)
+        if stats is None:
+            self.stages[name] = [1, duration, duration]
+        else:
+            stats[0] += 1
+            stats[1] += duration
+            if duration > stats[2]:
+                stats[2] = duration
+        for listener in self.listeners:
+            listener(name, start, duration)
+
+    def report(self):
+        """
+        Returns:
+            dict: {"stages": {name: {"calls", "total_s", "max_s"}}, "counters": {name: value}}.
+        """
+        return {
+            'stages': {name: {'calls': calls, 'total_s': total, 'max_s': longest}
+                       for name, (calls, total, longest) in sorted(self.stages.items())},
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+recorder = Recorder()
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        recorder.add_time(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+_NULL_STAGE = contextlib.nullcontext()
+
+def stage(name):
+    """
+    Times a section of code when instrumentation is enabled.
+
+    Parameters:
+        name (str): The stage name, e.g. "UTRChooser.structure".
+
+    Returns:
+        A context manager.
+    """
+    if not enabled:
+        return _NULL_STAGE
+    return _Stage(name)
+
+def count(name, amount=1):
+    """
+    Increments a counter when instrumentation is enabled.
+
+    Parameters:
+        name (str): The counter name, e.g. "UTRChooser.rejected_kozak".
+        amount (int): The increment.
+    """
+    if enabled:
+        recorder.counters[name] = recorder.counters.get(name, 0) + amount
+
+def enable():
+    """
+    Turns instrumentation on.
+    """
+    global enabled
+    enabled = True
+
+def disable():
+    """
+    Turns instrumentation off; recorded data is kept until reset().
+    """
+    global enabled
+    enabled = False
+
+def reset():
+    """
+    Clears all recorded stage timings and counters.
+    """
+    recorder.stages.clear()
+    recorder.counters.clear()
+
+def add_listener(listener):
+    """
+    Registers a callable notified as listener(name, start, duration) for every finished stage.
+    """
+    recorder.listeners.append(listener)
+
+def remove_listener(listener):
+    """
+    Unregisters a listener added with add_listener.
+    """
+    recorder.listeners.remove(listener)
+
+def report():
+    """
+    Returns:
+        dict: The recorded stage timings and counters.
+    """
+    return recorder.report()
+
+def dumps(indent=2):
+    """
+    Returns:
+        str: The recorded stage timings and counters as JSON.
+    """
+    return json.dumps(report(), indent=indent)
+
+def dump(path):
+    """
+    Writes the recorded stage timings and counters to a JSON file.
+
+    Parameters:
+        path (str): The destination file.
+    """
+    with open(path, 'w') as handle:
+        handle.write(dumps())
+
+@contextlib.contextmanager
+def profile(path=None):
+    """
+    Enables instrumentation and cProfile for the duration of a block.
+
+    Parameters:
+        path (str): If given, the cProfile statistics are written to this file (readable with pstats/snakeviz).
+
+    Yields:
+        cProfile.Profile: The profiler, so callers can inspect or print its statistics.
+    """
+    import cProfile
+
+    was_enabled = enabled
+    enable()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if not was_enabled:
+            disable()
+        if path:
+            profiler.dump_stats(path)
+
+if os.environ.get('DESIGN_INSTRUMENTATION') == '1':
+    enable()
@@ -0,0 +1,157 @@
+import json
+import time
+from collections import OrderedDict
+
+def _identity(value):
+    return value
+
+class ResultCache:
+    """
+    A bounded least-recently-used result cache with an optional time-to-live and an optional on-disk store.
+
+    Keys are strings. With a path, results are also written to a SQLite database, so other processes (and later
+    runs) using the same path share them; entries found on disk are promoted into memory. Values stored on disk
+    must be JSON-serialisable after encode.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept in memory.
+        ttl (float): Seconds an entry stays valid, or None to keep entries until evicted.
+        path (str): The SQLite database shared across processes, or None for a memory-only cache.
+        hits (int): Lookups answered from memory or disk.
+        misses (int): Lookups that found no valid entry.
+        evictions (int): Entries dropped from memory to respect maxsize.
+        expirations (int): Entries found but discarded because they were older than ttl.
+    """
+    def __init__(self, maxsize=1024, ttl=None, path=None, encode=None, decode=None):
+        """
+        Parameters:
+            maxsize (int): Maximum number of entries kept in memory.
+            ttl (float): Seconds an entry stays valid, or None.
+            path (str): SQLite database to share results through, or None.
+            encode (callable): Converts a value to JSON-serialisable data for the disk store.
+            decode (callable): Converts data loaded from the disk store back to a value.
+        """
+        if maxsize < 1:
+            raise ValueError("Cache size must be positive.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.encode = encode or _identity
+        self.decode = decode or _identity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._db = None
+
+    def __getstate__(self):
+        # Worker processes get an empty cache that reconnects to the same disk store
+        state = self.__dict__.copy()
+        state['_entries'] = OrderedDict()
+        state['_db'] = None
+        return state
+
+    def get(self, key):
+        """
+        Looks up a result.
+
+        Parameters:
+            key (str): The cache key.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss.
+        """
+        now = time.time()
+        expired = False
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self._expired(entry[0], now):
+                del self._entries[key]
+                expired = True
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+
+        if self.path:
+            row = self._connection().execute("SELECT created, value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                if self._expired(row[0], now):
+                    expired = True
+                else:
+                    value = self.decode(json.loads(row[1]))
+                    self._remember(key, value, row[0])
+                    self.hits += 1
+                    return True, value
+
+        self.expirations += expired
+        self.misses += 1
+        return False, None
+
+    def put(self, key, value):
+        """
+        Stores a result.
+
+        Parameters:
+            key (str): The cache key.
+            value: The result.
+        """
+        now = time.time()
+        self._remember(key, value, now)
+        if self.path:
+            connection = self._connection()
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO results (key, created, value) VALUES (?, ?, ?)",
+                                   (key, now, json.dumps(self.encode(value))))
+
+    def clear(self):
+        """
+        Drops every entry from memory and, if there is one, from the disk store.
+        """
+        self._entries.clear()
+        if self.path:
+            connection = self._connection()
+            with connection:
+                connection.execute("DELETE FROM results")
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit, miss, eviction and expiration counts, the hit rate and the number of entries in memory.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'size': len(self._entries),
+        }
+
+    def close(self):
+        """
+        Closes the connection to the disk store, if open.
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key, value, created):
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _connection(self):
+        if self._db is None:
+            import sqlite3
+            self._db = sqlite3.connect(self.path, timeout=30)
+            with self._db:
+                self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, created REAL, value TEXT)")
+        return self._db
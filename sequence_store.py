@@ -0,0 +1,268 @@
+"""
+A compact, memory-mapped genome store.
+
+build_sequence_store converts a GenBank file once into two files:
+    <path>       The contig sequences, 2-bit packed (A=0, C=1, G=2, T=3, four bases per byte, most significant
+                 bits first). Each contig starts on a byte boundary.
+    <path>.json  The index: for each contig its byte offset, length, any runs of non-ACGT bases and the sorted
+                 spans of all its loci, and for each gene with a CDS its name, contig, coordinates, strand and CDS
+                 parts.
+
+SequenceStore memory-maps the packed file, so any number of processes can fetch CDSs and UTR windows of any
+length from the same pages of the OS page cache without reparsing the GenBank file or holding the genome in
+memory. A SequenceStore pickles as its path, so it can be handed to worker processes cheaply.
+
+Example:
+    build_sequence_store("data/genomic.gbff", "data/genomic.2bit")
+    with SequenceStore("data/genomic.2bit") as store:
+        store.utr("YGR192C", 100)
+        store.genes_info(utr_length=200, clip=True)
+"""
+import json
+import mmap
+import re
+import instrumentation
+from genome_data_parsing import IntervalIndex, locus_intervals, utr_window
+
+FORMAT = 2
+_PACK = str.maketrans('ACGT', '0123')
+_UNPACK = [''.join('ACGT'[(byte >> shift) & 3] for shift in (6, 4, 2, 0)) for byte in range(256)]
+_COMPLEMENT = str.maketrans('ACGTNacgtn', 'TGCANtgcan')
+_NON_ACGT = re.compile('[^ACGT]+')
+
+def _reverse_complement(sequence):
+    # Unlike bio_functions.reverse_complement this keeps ambiguous bases (as themselves) instead of rejecting them
+    return sequence.translate(_COMPLEMENT)[::-1]
+
+def _pack(sequence):
+    """
+    Returns:
+        tuple: (packed bytes, [[start, bases], ...] runs of non-ACGT bases, which are packed as A).
+    """
+    exceptions = [[match.start(), match.group()] for match in _NON_ACGT.finditer(sequence)]
+    if exceptions:
+        sequence = _NON_ACGT.sub(lambda match: 'A' * len(match.group()), sequence)
+    digits = sequence.translate(_PACK) + '0' * (-len(sequence) % 4)
+    if not digits:
+        return b'', exceptions
+    return int(digits, 4).to_bytes(len(digits) // 4, 'big'), exceptions
+
+def build_sequence_store(genbank_file, path):
+    """
+    Converts a GenBank file into a packed sequence file and its JSON index.
+
+    Genes are indexed by locus tag, using the first CDS with the same locus tag in the same record, as in
+    extract_genes_info.
+
+    Parameters:
+        genbank_file (str): The GenBank file to convert.
+        path (str): The packed sequence file to write; the index is written to path + ".json".
+
+    Returns:
+        dict: The index.
+    """
+    from Bio import SeqIO
+
+    contigs, features = {}, {}
+    offset = 0
+    with open(path, 'wb') as handle:
+        for record in SeqIO.parse(genbank_file, "genbank"):
+            instrumentation.count("build_sequence_store.records_parsed")
+            if record.id in contigs:
+                raise ValueError(f"Duplicate contig id: {record.id}")
+            data, exceptions = _pack(str(record.seq).upper())
+            handle.write(data)
+            contigs[record.id] = {'offset': offset, 'length': len(record.seq), 'exceptions': exceptions,
+                                  'intervals': sorted(locus_intervals(record.features))}
+            offset += len(data)
+
+            cds_features = {}
+            for feature in record.features:
+                if feature.type == "CDS":
+                    locus_tag = feature.qualifiers.get("locus_tag", [None])[0]
+                    if locus_tag is not None:
+                        cds_features.setdefault(locus_tag, feature)
+            for feature in record.features:
+                if feature.type != "gene":
+                    continue
+                locus_tag = feature.qualifiers.get("locus_tag", [None])[0]
+                cds_feature = cds_features.get(locus_tag)
+                if cds_feature is None:
+                    continue
+                location = cds_feature.location
+                features[locus_tag] = {
+                    'gene': feature.qualifiers.get("gene", [None])[0],
+                    'contig': record.id,
+                    'start': int(location.start),
+                    'end': int(location.end),
+                    'strand': 1 if location.strand == 1 else -1,
+                    'parts': [[int(part.start), int(part.end), 1 if part.strand == 1 else -1] for part in location.parts],
+                }
+                instrumentation.count("build_sequence_store.genes_indexed")
+
+    index = {'format': FORMAT, 'contigs': contigs, 'features': features}
+    with open(path + '.json', 'w') as handle:
+        json.dump(index, handle)
+    return index
+
+class SequenceStore:
+    """
+    Read access to a genome written by build_sequence_store.
+
+    Attributes:
+        path (str): The packed sequence file.
+        contigs (dict): Contig id -> {"offset", "length", "exceptions", "intervals"}.
+        features (dict): Locus tag -> {"gene", "contig", "start", "end", "strand", "parts"}.
+    """
+    def __init__(self, path):
+        """
+        Opens and memory-maps a packed sequence file and loads its index.
+
+        Parameters:
+            path (str): The packed sequence file written by build_sequence_store.
+        """
+        self.path = path
+        with open(path + '.json') as handle:
+            index = json.load(handle)
+        if index.get('format') != FORMAT:
+            raise ValueError(f"Unsupported sequence store format {index.get('format')}; rebuild it with build_sequence_store.")
+        self.contigs = index['contigs']
+        self.features = index['features']
+        self._interval_indexes = {}
+        self._file = open(path, 'rb')
+        # mmap cannot map an empty file; a genome without sequence has nothing to fetch anyway
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if any(
+            contig['length'] for contig in self.contigs.values()) else b''
+
+    def __reduce__(self):
+        # Worker processes reopen the same file instead of receiving a copy of the genome
+        return SequenceStore, (self.path,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        """
+        Unmaps and closes the packed sequence file.
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def fetch(self, contig, start, end, strand=1):
+        """
+        Fetches a region of a contig.
+
+        Parameters:
+            contig (str): The contig id.
+            start (int): Start of the region (0-based, inclusive); clipped to the contig.
+            end (int): End of the region (exclusive); clipped to the contig.
+            strand (int): 1 for the forward strand, -1 for the reverse complement.
+
+        Returns:
+            str: The sequence of the region.
+        """
+        if contig not in self.contigs:
+            raise ValueError(f"Unknown contig: {contig}")
+        info = self.contigs[contig]
+        start, end = max(0, start), min(end, info['length'])
+        if start >= end:
+            return ''
+        first = info['offset'] + start // 4
+        data = self._data[first:info['offset'] + (end + 3) // 4]
+        sequence = ''.join([_UNPACK[byte] for byte in data])[start % 4:start % 4 + end - start]
+
+        for position, bases in info['exceptions']:
+            if position < end and position + len(bases) > start:
+                overlap_start, overlap_end = max(position, start), min(position + len(bases), end)
+                sequence = (sequence[:overlap_start - start] + bases[overlap_start - position:overlap_end - position]
+                            + sequence[overlap_end - start:])
+        return sequence if strand == 1 else _reverse_complement(sequence)
+
+    def cds(self, locus_tag):
+        """
+        Fetches the coding sequence of a gene, joining its parts in order.
+
+        Parameters:
+            locus_tag (str): The locus tag of the gene.
+
+        Returns:
+            str: The coding sequence.
+        """
+        feature = self._feature(locus_tag)
+        return ''.join(self.fetch(feature['contig'], start, end, strand) for start, end, strand in feature['parts'])
+
+    def utr(self, locus_tag, length=50, clip=False):
+        """
+        Fetches the region upstream of a gene's CDS on its own strand.
+
+        Parameters:
+            locus_tag (str): The locus tag of the gene.
+            length (int): Maximum number of bases upstream of the start codon; clipped at the contig ends.
+            clip (bool): Also clip the region to the intergenic space before the neighbouring locus.
+
+        Returns:
+            str: The upstream region, read 5' to 3' on the gene's strand.
+        """
+        contig, start, end, strand = self.utr_windows(length, clip, [locus_tag])[locus_tag]
+        return self.fetch(contig, start, end, strand)
+
+    def utr_windows(self, utr_length=50, clip=True, locus_tags=None):
+        """
+        Computes the upstream window of every gene from the stored coordinates, without fetching any sequence.
+
+        Parameters:
+            utr_length (int): Maximum number of bases upstream of each start codon.
+            clip (bool): Clip each window to the intergenic space before the neighbouring locus.
+            locus_tags (iterable): The genes to compute windows for; all genes if omitted.
+
+        Returns:
+            dict: Locus tag -> (contig, start, end, strand), with start and end on the forward strand.
+        """
+        windows = {}
+        for locus_tag in self.features if locus_tags is None else locus_tags:
+            feature = self._feature(locus_tag)
+            contig = feature['contig']
+            intervals = self._intervals(contig) if clip else None
+            start, end = utr_window(feature['start'], feature['end'], feature['strand'], utr_length,
+                                    self.contigs[contig]['length'], intervals, locus_tag)
+            windows[locus_tag] = (contig, start, end, feature['strand'])
+        return windows
+
+    def genes_info(self, utr_length=50, clip=False):
+        """
+        Returns the same gene information as extract_genes_info, read from the store.
+
+        Parameters:
+            utr_length (int): Maximum number of bases upstream of each start codon.
+            clip (bool): Clip each upstream region to the intergenic space before the neighbouring locus.
+
+        Returns:
+            dict: Locus tag -> {"gene", "UTR", "CDS"}.
+        """
+        windows = self.utr_windows(utr_length, clip)
+        return {locus_tag: {'gene': feature['gene'], 'UTR': self.fetch(*windows[locus_tag]), 'CDS': self.cds(locus_tag)}
+                for locus_tag, feature in self.features.items()}
+
+    def _intervals(self, contig):
+        if contig not in self._interval_indexes:
+            self._interval_indexes[contig] = IntervalIndex(tuple(interval) for interval in self.contigs[contig]['intervals'])
+        return self._interval_indexes[contig]
+
+    def _feature(self, locus_tag):
+        if locus_tag not in self.features:
+            raise ValueError(f"Unknown locus tag: {locus_tag}")
+        return self.features[locus_tag]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert a GenBank file into a packed, memory-mappable sequence store.")
+    parser.add_argument('genbank_file')
+    parser.add_argument('path', help="The packed sequence file to write; the index is written next to it as .json.")
+    args = parser.parse_args()
+    index = build_sequence_store(args.genbank_file, args.path)
+    print(f"Wrote {len(index['contigs'])} contigs and {len(index['features'])} genes to {args.path}")
@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import dataclasses
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+WRAPPER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wrapper')
+
+def load_descriptors(wrapper_dir=WRAPPER_DIR):
+    """
+    Loads the function descriptors from the wrapper directory.
+
+    Parameters:
+        wrapper_dir (str): Directory containing the *.json function descriptors.
+
+    Returns:
+        dict: Function id -> descriptor, for every file that describes a function.
+    """
+    descriptors = {}
+    for path in sorted(glob.glob(os.path.join(wrapper_dir, '*.json'))):
+        with open(path) as handle:
+            descriptor = json.load(handle)
+        if descriptor.get('type') == 'function' and 'execution_details' in descriptor:
+            descriptors[descriptor['id']] = descriptor
+    return descriptors
+
+def _target(descriptor):
+    """
+    Returns:
+        tuple: (module name, class name or None, attribute name) described by execution_details.
+    """
+    details = descriptor['execution_details']
+    module = os.path.splitext(details['source'])[0]
+    target = details['execution'].split('(')[0].strip()
+    if '.' in target:
+        class_name, attribute = target.split('.', 1)
+        return module, class_name, attribute
+    return module, None, target
+
+# ------------------------------------------------------------ worker process
+
+_instances = {}
+
+def _instance(module, class_name):
+    # One warm, initiated instance of each class per worker process
+    key = (module, class_name)
+    if key not in _instances:
+        instance = getattr(importlib.import_module(module), class_name)()
+        instance.initiate()
+        if class_name == 'UTRChooser':
+            instance.enable_result_cache()  # Workers answer many repeated queries
+        _instances[key] = instance
+    return _instances[key]
+
+def _convert_argument(value, kind):
+    if kind == 'integer' and isinstance(value, str):
+        return int(value)
+    if kind == 'UTROption' and isinstance(value, dict):
+        from design_utr import UTROption
+        return UTROption(**value)
+    if kind == 'set':
+        return set(_convert_argument(item, 'UTROption') for item in value)
+    return value
+
+def _to_json(value):
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(_to_json(item) for item in value)
+    return value
+
+def _call(descriptor, arguments):
+    module, class_name, attribute = _target(descriptor)
+    kinds = {item['name']: item['type'] for item in descriptor['inputs']}
+    unknown = set(arguments) - set(kinds)
+    if unknown:
+        raise ValueError(f"Unknown arguments: {sorted(unknown)}")
+    kwargs = {name: _convert_argument(value, kinds[name]) for name, value in arguments.items()}
+    if class_name is None:
+        function = getattr(importlib.import_module(module), attribute)
+    else:
+        function = getattr(_instance(module, class_name), attribute)
+    return _to_json(function(**kwargs))
+
+def _run_batch(calls):
+    """
+    Executes a batch of (descriptor, arguments) calls in a worker process.
+
+    Every call is isolated, so one failing call never fails the other calls batched with it.
+
+    Returns:
+        list: (ok, result or error message) for each call.
+    """
+    results = []
+    for descriptor, arguments in calls:
+        try:
+            results.append((True, _call(descriptor, arguments)))
+        except (ValueError, TypeError, KeyError) as e:
+            results.append((False, str(e)))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+# ------------------------------------------------------------------ service
+
+class Metrics:
+    """
+    Latency and throughput counters for the service.
+
+    Attributes:
+        started (float): Time the service started.
+        requests (dict): Function id -> number of calls served, including coalesced calls.
+        errors (int): Number of calls that raised an error.
+        coalesced (int): Number of calls answered by an identical in-flight call.
+        batches (int): Number of batches submitted to the worker pool.
+        latencies (deque): The most recent call latencies, in seconds.
+    """
+    def __init__(self, window=1000):
+        self.started = time.perf_counter()
+        self.requests = {}
+        self.errors = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.completed = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, function_id, latency, ok):
+        self.requests[function_id] = self.requests.get(function_id, 0) + 1
+        self.completed += 1
+        self.errors += not ok
+        self.latencies.append(latency)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: The current metrics, with latency percentiles in milliseconds.
+        """
+        latencies = sorted(self.latencies)
+        def percentile(p):
+            return round(1000 * latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+        uptime = time.perf_counter() - self.started
+        return {
+            'uptime_s': round(uptime, 3),
+            'completed': self.completed,
+            'throughput_per_s': round(self.completed / uptime, 3) if uptime else 0.0,
+            'requests': dict(self.requests),
+            'errors': self.errors,
+            'coalesced': self.coalesced,
+            'batches': self.batches,
+            'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'max': percentile(1.0)},
+        }
+
+class DesignService:
+    """
+    An asyncio HTTP/JSON service that exposes the functions described in wrapper/*.json.
+
+    CPU work runs in a process pool whose workers each keep warm, initiated instances of the classes they
+    serve (UTRChooser, PrimerDesigner), so initiate() runs once per worker instead of once per request.
+    Concurrent identical calls are coalesced onto a single execution, and calls arriving within
+    batch_window seconds of each other are sent to the pool as one batch.
+
+    Endpoints:
+        GET /functions: The loaded descriptors.
+        GET /metrics: Latency and throughput metrics.
+        POST /call: Body {"function_id": ..., "arguments": {...}}; returns {"result": ...}.
+    """
+    def __init__(self, descriptors=None, workers=1, batch_size=32, batch_window=0.002):
+        """
+        Parameters:
+            descriptors (dict): Function id -> descriptor; loaded from the wrapper directory if omitted.
+            workers (int): Number of worker processes.
+            batch_size (int): Maximum number of calls per batch.
+            batch_window (float): Seconds to wait for more calls before submitting a batch.
+        """
+        self.descriptors = load_descriptors() if descriptors is None else descriptors
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.metrics = Metrics()
+        self.executor = None
+        self.server = None
+        self._in_flight = {}
+        self._queue = None
+        self._batcher = None
+
+    async def start(self, host='127.0.0.1', port=8134):
+        """
+        Starts the worker pool, the batcher and the HTTP server.
+
+        Returns:
+            asyncio.Server: The running server.
+        """
+        # Spawned rather than forked workers, so they never inherit open client sockets
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    async def stop(self):
+        """
+        Stops the server, the batcher and the worker pool.
+        """
+        self.server.close()
+        await self.server.wait_closed()
+        self._batcher.cancel()
+        self.executor.shutdown()
+
+    async def call(self, function_id, arguments):
+        """
+        Executes a described function, coalescing identical concurrent calls.
+
+        Parameters:
+            function_id (str): The id of the function descriptor.
+            arguments (dict): The call arguments, by input name.
+
+        Returns:
+            tuple: (ok, result or error message).
+        """
+        if function_id not in self.descriptors:
+            raise KeyError(function_id)
+        key = (function_id, json.dumps(arguments, sort_keys=True))
+        start = time.perf_counter()
+        if key in self._in_flight:
+            self.metrics.coalesced += 1
+            ok, result = await asyncio.shield(self._in_flight[key])
+            self.metrics.record(function_id, time.perf_counter() - start, ok)
+            return ok, result
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        await self._queue.put((self.descriptors[function_id], arguments, future))
+        try:
+            ok, result = await future
+        finally:
+            del self._in_flight[key]
+        self.metrics.record(function_id, time.perf_counter() - start, ok)
+        return ok, result
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.metrics.batches += 1
+            asyncio.create_task(self._submit(batch))
+
+    async def _submit(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, _run_batch, [(d, a) for d, a, _ in batch])
+        except Exception as e:
+            results = [(False, f"Worker failed: {e}")] * len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            status, payload = await self._route(request_line, body)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, payload = 400, {'error': str(e)}
+        except Exception as e:
+            # Always answer, rather than dropping the connection without a response
+            status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+        data = json.dumps(payload).encode('utf-8')
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 422: 'Unprocessable Entity',
+                   500: 'Internal Server Error'}
+        writer.write(
+            f"HTTP/1.1 {status} {reasons[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode('latin-1') + data
+        )
+        await writer.drain()
+        writer.close()
+
+    async def _route(self, request_line, body):
+        if len(request_line) < 2:
+            raise ValueError("Malformed request line.")
+        method, path = request_line[0], request_line[1]
+        if path == '/functions' and method == 'GET':
+            return 200, list(self.descriptors.values())
+        if path == '/metrics' and method == 'GET':
+            return 200, self.metrics.snapshot()
+        if path == '/call':
+            if method != 'POST':
+                return 405, {'error': 'Use POST for /call.'}
+            request = json.loads(body or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("The request body must be a JSON object.")
+            if not isinstance(request.get('arguments', {}), dict):
+                raise ValueError("arguments must be a JSON object.")
+            try:
+                ok, result = await self.call(request.get('function_id'), request.get('arguments', {}))
+            except KeyError:
+                return 404, {'error': f"Unknown function: {request.get('function_id')}"}
+            return (200, {'result': result}) if ok else (422, {'error': result})
+        return 404, {'error': f"Unknown path: {path}"}
+
+async def _serve(host, port, workers):
+    service = DesignService(workers=workers)
+    server = await service.start(host, port)
+    print(f"Serving {len(service.descriptors)} functions on http://{host}:{port} with {workers} workers")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the wrapper functions over HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8134)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port, args.workers))
@@ -0,0 +1,31 @@
+import pytest
+from design_utr import UTRChooser, UTROption
+from design_pipeline import GenePipeline
+from checkers.forbidden_sequence_checker import ForbiddenSequenceChecker
+
+# Small in-memory UTR options used instead of the genome data
+UTR_OPTIONS = [
+    UTROption(utr="ACGGACGGTCCACCTAAAAAA", cds="ATGCATG", gene_name="GeneX", first_six_aas="MALQ"),
+    UTROption(utr="GCAGCTCTTACCTACTTCAG", cds="ATGCATG", gene_name="GeneY", first_six_aas="MSAG"),
+]
+
+@pytest.fixture
+def make_chooser():
+    # Builds a chooser with the default forbidden sites and the given options, without loading any genome data
+    def make(options=UTR_OPTIONS):
+        chooser = UTRChooser()
+        chooser.seq_checker = ForbiddenSequenceChecker()
+        chooser.seq_checker.initiate()
+        chooser.utrOptions = list(options)
+        return chooser
+    return make
+
+@pytest.fixture
+def utr_chooser(make_chooser):
+    return make_chooser()
+
+@pytest.fixture
+def pipeline(utr_chooser):
+    pipeline = GenePipeline()
+    pipeline.initiate(utr_chooser)
+    return pipeline
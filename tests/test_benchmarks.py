@@ -0,0 +1,39 @@
+import random
+from bio_functions import translate
+from benchmarks.generators import random_cds, random_dna
+from benchmarks.run_benchmarks import compare, measure
+from folding import _fold
+
+def test_generators_are_reproducible():
+    # The same seed always produces the same sequences
+    assert random_dna(100, random.Random(1)) == random_dna(100, random.Random(1))
+    assert set(random_dna(100, random.Random(1))) <= set("ACGT")
+
+def test_random_cds_is_an_open_reading_frame():
+    # Generated CDSs start with ATG and only stop at the last codon
+    protein = translate(random_cds(50, random.Random(2)))
+    assert len(protein) == 50
+    assert protein[0] == "M"
+    assert protein.index("_") == 49
+
+def test_measure():
+    # Measurements report per-call timings
+    result = measure(lambda: sum(range(100)), repeats=3, min_time=0.001)
+    assert result["repeats"] == 3
+    assert 0 < result["min_s"] <= result["median_s"]
+
+def test_compare_flags_regressions():
+    # Only benchmarks slower than the threshold are flagged
+    baseline = {"a": {"median_s": 1.0}, "b": {"median_s": 1.0}}
+    results = {"a": {"median_s": 1.1}, "b": {"median_s": 1.5}, "c": {"median_s": 9.0}}
+    rows = {row[0]: row[4] for row in compare(results, baseline, 0.2)}
+    assert rows == {"a": False, "b": True}
+
+def test_fold_window_budget():
+    # Windows of a 50 nt UTR and the first 30 nt of the CDS fold fast enough to score every option at initiate and
+    # every query at run: one window within 25 ms, and a batch within 5 ms per window
+    rng = random.Random(3)
+    window = random_dna(80, rng)
+    batch = [random_dna(80, rng) for _ in range(64)]
+    assert measure(lambda: _fold([window]), repeats=3, min_time=0.01)["median_s"] < 0.025
+    assert measure(lambda: _fold(batch), repeats=3, min_time=0.01)["median_s"] < 64 * 0.005
@@ -0,0 +1,61 @@
+import os
+import pytest
+from bio_functions import translate
+from codon_optimizer import CodonOptimizer, build_codon_usage
+from design_utr import UTRChooser
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'data', 'fixture.gbff')
+
+@pytest.fixture
+def optimizer(utr_chooser):
+    # Glycine prefers GGA and serine prefers TCC, so "GS" naively becomes the BamHI site GGATCC
+    utr_chooser.codon_usage = build_codon_usage(["GGAGGAGGAGGTTCCTCCTCCTCT", "ATGATGTAA"])
+    optimizer = CodonOptimizer()
+    optimizer.initiate(utr_chooser)
+    return optimizer
+
+def test_build_codon_usage():
+    usage = build_codon_usage(["ATGGGAGGAGGT", "GGCTAA"])
+    assert usage['M'] == {'ATG': 1.0}
+    assert usage['G'] == {'GGA': 0.5, 'GGT': 0.25, 'GGC': 0.25}
+    assert usage['_'] == {'TAA': 1.0}
+
+def test_preferred_codons(optimizer):
+    assert optimizer.run("MG_") == "ATGGGATAA"
+
+def test_avoids_forbidden_site(optimizer):
+    # The second-best serine codon is used to break the BamHI site
+    cds = optimizer.run("MGS_")
+    assert translate(cds) == "MGS_"
+    assert "GGATCC" not in cds
+    assert optimizer.seq_checker.find_sites(cds) == []
+
+def test_avoids_junction_site(optimizer):
+    # Sites spanning the upstream sequence and the CDS are avoided too
+    cds = optimizer.run("SM_", upstream="AAAGGA")
+    assert "GGATCC" not in "AAAGGA" + cds
+
+def test_recode_cds(optimizer):
+    assert optimizer.run("ATGGGTGGCTAA", is_cds=True) == "ATGGGAGGATAA"
+
+def test_long_protein(optimizer):
+    protein = "M" + "ACDEFGHIKLMNPQRSTVWY" * 25 + "_"
+    cds = optimizer.run(protein)
+    assert translate(cds) == protein
+    assert optimizer.seq_checker.find_sites(cds) == []
+
+def test_invalid_protein(optimizer):
+    with pytest.raises(ValueError):
+        optimizer.run("MXB")
+    with pytest.raises(ValueError):
+        optimizer.run("")
+
+def test_usage_from_chooser():
+    # UTRChooser builds the codon usage table from the same top-performing genes as its UTR options
+    chooser = UTRChooser()
+    chooser.genbank_file = FIXTURE
+    chooser.initiate()
+    assert chooser.codon_usage
+    assert chooser.codon_usage['M'] == {'ATG': 1.0}
+    for frequencies in chooser.codon_usage.values():
+        assert sum(frequencies.values()) == pytest.approx(1.0)
@@ -0,0 +1,103 @@
+import io
+import pytest
+from utils.construction_file import PCR, Digest, GoldenGate, Transform, ConstructionFile
+from utils.construction_file_io import ConstructionFileWriter, read_binary, read_text, write_text, save, load, pack_sequence, unpack_sequence
+
+VECTOR = "GCTTCAGCACTTCAATCTCTACATCGTCGTTACGGATAACTCTGGCCAACGTACCAAATGAGAGACCTTTTTGGTCTCA"
+
+def make_cf(index):
+    steps = [
+        PCR("fwd", f"rev{index}", "template", "pcrpdt"),
+        Digest("pcrpdt", ["BsaI"], 1, "dig", product_size=52),
+        GoldenGate(["dig", "vector"], "BsaI", "assembly"),
+        Transform("assembly", "Mach1", ["Amp", "Kan"], "clone", temperature=37.5),
+    ]
+    sequences = {"fwd": "CCGGTCTCAAATG", f"rev{index}": "ACGT" * (index + 3), "template": "ATGACCTGACTGA", "vector": VECTOR}
+    return ConstructionFile(steps, sequences)
+
+def assert_same(a, b):
+    assert a.sequences == b.sequences
+    assert len(a.steps) == len(b.steps)
+    for left, right in zip(a.steps, b.steps):
+        assert type(left) is type(right)
+        for name in type(left).__slots__ + ('operation', 'output'):
+            assert getattr(left, name) == getattr(right, name)
+
+def test_steps_use_slots():
+    # Steps do not carry a per-instance __dict__
+    step = make_cf(0).steps[0]
+    assert not hasattr(step, "__dict__")
+    with pytest.raises(AttributeError):
+        step.unknown = 1
+
+def test_text_round_trip():
+    # The text format round-trips every step field and sequence
+    handle = io.StringIO()
+    write_text([make_cf(0), make_cf(1)], handle)
+    handle.seek(0)
+    loaded = list(read_text(handle))
+
+    assert len(loaded) == 2
+    assert_same(loaded[0], make_cf(0))
+    assert_same(loaded[1], make_cf(1))
+
+def test_binary_round_trip_and_dedup():
+    # The binary format round-trips and stores sequences shared between files only once
+    handle = io.BytesIO()
+    with ConstructionFileWriter(handle) as writer:
+        for index in range(50):
+            writer.write(make_cf(index))
+    data = handle.getvalue()
+    loaded = list(read_binary(io.BytesIO(data)))
+
+    assert len(loaded) == 50
+    assert_same(loaded[7], make_cf(7))
+    assert len(writer.sequences) == 3 + 50
+    assert data.count(pack_sequence(VECTOR)[1]) == 1
+
+def test_pack_sequence():
+    # ACGT-only sequences are 2-bit packed; anything else is stored raw
+    flag, data = pack_sequence("ACGTTGCAA")
+    assert len(data) == 3
+    assert unpack_sequence(flag, data, 9) == "ACGTTGCAA"
+    flag, data = pack_sequence("ACGNNT")
+    assert unpack_sequence(flag, data, 6) == "ACGNNT"
+
+def test_save_and_load(tmp_path):
+    # The file extension selects the format
+    for name in ("files.cf", "files.cfb"):
+        path = str(tmp_path / name)
+        save((make_cf(index) for index in range(3)), path)
+        assert_same(list(load(path))[2], make_cf(2))
+
+def test_invalid_text_value():
+    # Names containing separators cannot be written to the text format
+    cf = ConstructionFile([Digest("a,b", ["EcoRI"], 0, "dig")], {})
+    with pytest.raises(ValueError, match="cannot be written"):
+        write_text([cf], io.StringIO())
+
+def test_number_fields_round_trip():
+    # Integers stay integers, and floats written in exponent notation are read back
+    for temperature in (37, 37.5, 1e20):
+        cf = ConstructionFile([Transform("assembly", "Mach1", ["Amp"], "clone", temperature=temperature)], {})
+        handle = io.StringIO()
+        write_text([cf], handle)
+        handle.seek(0)
+        value = next(read_text(handle)).steps[0].temperature
+        assert value == temperature and type(value) is type(temperature)
+
+def test_single_name_list_is_normalised():
+    # A single enzyme given as a string is read back as a one-element list
+    cf = ConstructionFile([Digest("pcrpdt", "EcoRI", 0, "dig")], {})
+    handle = io.BytesIO()
+    with ConstructionFileWriter(handle) as writer:
+        writer.write(cf)
+    assert next(read_binary(io.BytesIO(handle.getvalue()))).steps[0].enzymes == ["EcoRI"]
+
+def test_negative_int_rejected():
+    # Negative integers have no encoding in the binary format and are rejected by both writers
+    cf = ConstructionFile([Digest("pcrpdt", ["EcoRI"], -1, "dig")], {})
+    with pytest.raises(ValueError, match="Negative"):
+        ConstructionFileWriter(io.BytesIO()).write(cf)
+    with pytest.raises(ValueError, match="Negative"):
+        write_text([cf], io.StringIO())
@@ -0,0 +1,117 @@
+import pytest
+from bio_functions import reverse_complement
+from utils.construction_file import PCR, Digest, GoldenGate, Gibson, Transform, ConstructionFile
+from utils.construction_simulator import ConstructionSimulator, Product, digest, ligate
+
+TEMPLATE = "ATGGCTTCCTCCGAAGACGTTATCAAAGAGTTCATGCGTTTCAAAGTTCGTATGGAAGGTTCCGTTAACGGTCACGAGTTCGAAATCGAAGGTGAA"
+INSERT = "ATGAGTCAAGGCGGAAGAGCCTTAGCATCAACTACCATTAGCAAGAAC"
+BACKBONE = "CAGCACTTCAATCTCTACATCGTCGTTACGGATAACTCTGGCCAACGTACCA"
+
+@pytest.fixture
+def simulator():
+    simulator = ConstructionSimulator()
+    simulator.initiate()
+    return simulator
+
+def test_pcr_product(simulator):
+    # Oligo tails are added to the template region between the two annealing sites
+    forward = "CCCC" + TEMPLATE[5:25]
+    reverse = "GGGG" + reverse_complement(TEMPLATE[60:80])
+    cf = ConstructionFile([PCR("fwd", "rev", "template", "pcrpdt")], {"fwd": forward, "rev": reverse, "template": TEMPLATE})
+
+    product = simulator.run(cf)["pcrpdt"]
+
+    assert product.sequence == "CCCC" + TEMPLATE[5:80] + "CCCC"
+    assert product.size == 83
+
+def test_pcr_no_annealing(simulator):
+    # Oligos that do not match the template cannot produce a product
+    cf = ConstructionFile([PCR("fwd", "rev", "template", "pcrpdt")], {"fwd": "A" * 20, "rev": "C" * 20, "template": TEMPLATE})
+    with pytest.raises(ValueError, match="Oligos do not anneal"):
+        simulator.run(cf)
+
+def test_digest_and_religate(simulator):
+    # EcoRI fragments carry their AATT overhangs and ligate back into the original, still linear, sequence
+    sequence = INSERT + "GAATTC" + BACKBONE
+    fragments = digest(Product(sequence), [simulator.enzymes["EcoRI"]])
+
+    assert [fragment.overhangs for fragment in fragments] == [(0, 4), (4, 0)]
+    assert fragments[0].sequence.endswith("GAATT")
+    product = ligate(fragments)
+    assert product.sequence == sequence
+    assert not product.circular
+
+def test_blunt_ends_do_not_circularize():
+    assert not ligate([Product("ACGTACGT")]).circular
+
+def test_religate_opened_plasmid(simulator):
+    # A plasmid opened by PstI has compatible 3' TGCA ends and closes again
+    plasmid = INSERT + "CTGCAG" + BACKBONE
+    [fragment] = digest(Product(plasmid, True), [simulator.enzymes["PstI"]])
+
+    assert fragment.overhangs == (-4, -4)
+    product = ligate([fragment])
+    assert product.circular
+    assert product.sequence == "TGCAG" + BACKBONE + INSERT + "C"
+
+def test_overhang_polarity(simulator):
+    # A 3' TGCA overhang (PstI) does not anneal to a 5' TGCA overhang of the same sequence
+    left, right = digest(Product(INSERT + "CTGCAG" + BACKBONE), [simulator.enzymes["PstI"]])
+    assert ligate([left, right]).sequence == INSERT + "CTGCAG" + BACKBONE
+    with pytest.raises(ValueError, match="not compatible"):
+        ligate([left, Product("TGCA" + BACKBONE, False, (4, 0))])
+
+def test_golden_gate_assembly(simulator):
+    # BsaI releases the insert and opens the backbone; the matching overhangs close the circle
+    part = "TTGGTCTCA" + "AATG" + INSERT + "GCTT" + "TGAGACCTT"
+    vector = "GCTT" + BACKBONE + "AATG" + "AGAGACC" + "TTTTT" + "GGTCTCA"
+    cf = ConstructionFile(
+        [GoldenGate(["part", "vector"], "BsaI", "assembly"), Transform("assembly", "Mach1", ["Amp"], "clone")],
+        {"part": part, "vector": vector},
+    )
+
+    outputs = simulator.run(cf, circular={"vector"})
+
+    assert outputs["assembly"].circular
+    assert outputs["assembly"].sequence == "AATG" + INSERT + "GCTT" + BACKBONE
+    assert outputs["clone"] == outputs["assembly"]
+
+def test_gibson_assembly(simulator):
+    # Terminal homology joins the fragments and circularizes the product
+    cf = ConstructionFile(
+        [Gibson(["a", "b"], "assembly")],
+        {"a": INSERT + BACKBONE[:20], "b": INSERT[-20:] + BACKBONE + INSERT[:20]},
+    )
+    product = simulator.run(cf)["assembly"]
+
+    assert product.circular
+    assert product.sequence == INSERT + BACKBONE
+
+def test_unknown_input(simulator):
+    # Steps that reference sequences that are neither inputs nor outputs are rejected
+    cf = ConstructionFile([Digest("missing", ["EcoRI"], 0, "dig")], {})
+    with pytest.raises(ValueError, match="Unknown sequence missing"):
+        simulator.run(cf)
+
+def test_shared_steps_are_memoised(simulator):
+    # The same step appearing in several construction files is simulated once, serially or in parallel
+    sequences = {"fwd": TEMPLATE[:20], "rev": reverse_complement(TEMPLATE[-20:]), "template": TEMPLATE}
+    first = ConstructionFile([PCR("fwd", "rev", "template", "pcr1")], sequences)
+    second = ConstructionFile([PCR("fwd", "rev", "template", "pcr2"), Digest("pcr2", ["EcoRI"], 0, "dig")], sequences)
+
+    serial = simulator.run(first)
+    parallel = simulator.run(second, workers=2)
+
+    assert serial["pcr1"] == parallel["pcr2"]
+    assert len(simulator.cache) == 2
+
+def test_settings_change_invalidates_memo(simulator):
+    # The fragments share 40 bp of homology: enough at the default minimum, but not once it is raised to 50 bp
+    cf = ConstructionFile(
+        [Gibson(["a", "b"], "assembly")],
+        {"a": INSERT + BACKBONE[:20], "b": INSERT[-20:] + BACKBONE + INSERT[:20]},
+    )
+    simulator.run(cf)
+    simulator.gibson_overlap = 50
+    with pytest.raises(ValueError):
+        simulator.run(cf)
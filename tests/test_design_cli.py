@@ -0,0 +1,93 @@
+import io
+import json
+import pytest
+import design_cli
+from design_cli import read_fasta, read_records, read_table, run
+
+CDS = "ATGTCTGCGGGCGCTCGTTCGAGTATAATC"
+
+@pytest.fixture
+def fasta(tmp_path):
+    # Ten valid records with one invalid record in the middle
+    path = tmp_path / "genes.fasta"
+    records = [f">gene{i} description\n{CDS[:15]}\n{CDS[15:].lower()}\n" for i in range(10)]
+    records.insert(5, ">bad\nATGAA\n")
+    path.write_text(''.join(records))
+    return str(path)
+
+def test_read_fasta():
+    handle = io.StringIO(">a first\nATG\nAAA\n\n>b\nccc\n")
+    assert list(read_fasta(handle)) == [("a", "ATGAAA"), ("b", "CCC")]
+    with pytest.raises(ValueError):
+        list(read_fasta(io.StringIO("ATG\n")))
+
+def test_read_table(tmp_path):
+    assert list(read_table(io.StringIO("id,Sequence\na,atg\n"))) == [("a", "ATG")]
+    with pytest.raises(ValueError, match="'name'"):
+        list(read_table(io.StringIO("gene,dna\na,ATG\n")))
+    path = tmp_path / "genes.tsv"
+    path.write_text("name\tcds\na\tATGAAA\n")
+    assert list(read_records(str(path))) == [("a", "ATGAAA")]
+
+def test_tsv_output(pipeline, fasta, tmp_path):
+    output = str(tmp_path / "designs.tsv")
+    assert run(pipeline, fasta, output, chunksize=4) == (11, 1)
+    lines = open(output).read().splitlines()
+    assert lines[0].split('\t') == design_cli.OUTPUT_FIELDS
+    assert len(lines) == 12
+    first = dict(zip(design_cli.OUTPUT_FIELDS, lines[1].split('\t')))
+    assert first['name'] == "gene0" and first['status'] == "ok"
+    assert first['construct'] == first['utr5'] + CDS + first['utr3']
+    bad = dict(zip(design_cli.OUTPUT_FIELDS, lines[6].split('\t')))
+    assert bad['status'] == "error" and "multiple of 3" in bad['error']
+
+def test_jsonl_output(pipeline, fasta, tmp_path):
+    output = str(tmp_path / "designs.jsonl")
+    run(pipeline, fasta, output, output_format="jsonl", chunksize=4)
+    rows = [json.loads(line) for line in open(output)]
+    assert [row['name'] for row in rows] == [f"gene{i}" for i in range(5)] + ["bad"] + [f"gene{i}" for i in range(5, 10)]
+    assert rows[0]['utr5_gene'] == "GeneX"
+
+def test_resume_from_checkpoint(pipeline, fasta, tmp_path):
+    # An interrupted run restarted with the same arguments produces the same output as an uninterrupted one
+    expected = str(tmp_path / "expected.tsv")
+    run(pipeline, fasta, expected, chunksize=4)
+
+    output = str(tmp_path / "designs.tsv")
+    checkpoint = str(tmp_path / "designs.ckpt")
+    def interrupt(done, errors):
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        run(pipeline, fasta, output, chunksize=4, checkpoint_path=checkpoint, progress=interrupt)
+    with open(output, 'a') as handle:
+        handle.write("gene4\tpartial")  # Written after the checkpoint, before the interruption
+    assert json.load(open(checkpoint))['records'] == 4
+
+    assert run(pipeline, fasta, output, chunksize=4, checkpoint_path=checkpoint) == (7, 1)
+    assert open(output).read() == open(expected).read()
+    assert json.load(open(checkpoint))['records'] == 11
+
+def test_checkpoint_mismatch(pipeline, fasta, tmp_path):
+    checkpoint = str(tmp_path / "designs.ckpt")
+    run(pipeline, fasta, str(tmp_path / "designs.tsv"), checkpoint_path=checkpoint)
+    with pytest.raises(ValueError, match="different"):
+        run(pipeline, fasta, str(tmp_path / "other.tsv"), checkpoint_path=checkpoint)
+
+def test_checkpoint_input_changed(pipeline, fasta, tmp_path):
+    # An input edited after the checkpoint was written is not resumed
+    checkpoint = str(tmp_path / "designs.ckpt")
+    output = str(tmp_path / "designs.tsv")
+    run(pipeline, fasta, output, checkpoint_path=checkpoint)
+    with open(fasta, 'a') as handle:
+        handle.write(">extra\n" + CDS + "\n")
+    with pytest.raises(ValueError, match="changed"):
+        run(pipeline, fasta, output, checkpoint_path=checkpoint)
+
+def test_checkpoint_output_missing(pipeline, fasta, tmp_path):
+    # Resuming without the output the checkpoint refers to is reported as an error, not a traceback
+    checkpoint = str(tmp_path / "designs.ckpt")
+    output = tmp_path / "designs.tsv"
+    run(pipeline, fasta, str(output), checkpoint_path=checkpoint)
+    output.unlink()
+    with pytest.raises(ValueError, match="missing or shorter"):
+        run(pipeline, fasta, str(output), checkpoint_path=checkpoint)
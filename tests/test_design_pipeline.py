@@ -0,0 +1,51 @@
+import pytest
+from design_utr import UTROption
+from utils.construction_file import PCR
+
+CDS = "ATGTCTGCGGGCGCTCGTTCGAGTATAATC"
+
+def test_pipeline_design(pipeline):
+    # The construct is assembled from both UTRs and amplified by the designed primers
+    design = pipeline.run(CDS, "gene1")
+
+    assert design.utr5.gene_name == "GeneX"
+    assert design.utr3.gene_name == "GeneY"
+    assert design.construct == design.utr5.utr + CDS + design.utr3.utr
+    assert design.forbidden_sites == []
+
+    step = design.construction_file.steps[0]
+    assert isinstance(step, PCR)
+    assert design.construction_file.sequences["gene1"] == design.construct
+    assert design.construction_file.sequences[step.forward_oligo] == design.primers["forward_primer"]
+    assert step.product_size == len(design.construct) + 60
+
+def test_pipeline_invalid_cds(pipeline):
+    # The CDS is validated once, with the same errors as UTRChooser.run
+    with pytest.raises(ValueError, match="CDS sequence length must be a multiple of 3."):
+        pipeline.run("ATGAT")
+
+def test_pipeline_stream(pipeline):
+    # Streams keep input order and report per-record errors without stopping
+    records = [("a", CDS), ("bad", "ATGXXGTA"), ("b", CDS)]
+    results = list(pipeline.run_many(records, chunksize=2))
+
+    assert [name for name, _, _ in results] == ["a", "bad", "b"]
+    assert results[1][1] is None and "invalid characters" in results[1][2]
+    assert results[2][1].construct == results[0][1].construct
+
+def test_pipeline_stream_workers(pipeline):
+    # Worker processes produce the same designs as the serial pipeline
+    records = [(f"gene{index}", CDS) for index in range(6)]
+    serial = [design.construct for _, design, _ in pipeline.run_many(records)]
+    parallel = [design.construct for _, design, _ in pipeline.run_many(records, workers=2, chunksize=2)]
+    assert parallel == serial
+
+def test_pipeline_keeps_best_pair_when_options_run_out(pipeline):
+    # GeneX is the only Kozak-compliant 5' UTR, and its junction with the CDS is forbidden: the retry runs out of
+    # 5' options, so the first pair is returned with the junction site reported
+    pipeline.utr_chooser.utrOptions.append(
+        UTROption(utr="CACTACATCACAATCACTAC", cds="ATGTCT", gene_name="GeneZ", first_six_aas="MS"))
+    pipeline.seq_checker.forbidden.append("AAAAATGTCT")
+    design = pipeline.run(CDS, "gene1")
+    assert design.utr5.gene_name == "GeneX"
+    assert design.forbidden_sites == ["AAAAATGTCT"]
@@ -0,0 +1,70 @@
+import pytest
+from folding import FOLD_CACHE, fold_window, mfe, mfe_many
+from design_utr import UTRChooser, UTROption
+
+def test_mfe_simple_hairpin():
+    # Three G-C stacks closing a four-base loop: 3 * -1.84 + 3.5
+    assert mfe("GGGGAAAACCCC") == pytest.approx(-2.02)
+
+def test_mfe_unstructured():
+    assert mfe("AAAAAAAAAAAA") == 0.0
+    assert mfe("ACGT") == 0.0
+    assert mfe("") == 0.0
+
+def test_mfe_prefers_stronger_stem():
+    # A longer G-C stem is more stable than a shorter A-T stem
+    assert mfe("GCGCGCAAAAGCGCGC") < mfe("ATATAAAAATATAT") <= 0.0
+
+def test_mfe_multiple_hairpins():
+    # Independent hairpins along the strand add up
+    single = mfe("GGGGAAAACCCC")
+    assert mfe("GGGGAAAACCCC" + "TT" + "GGGGAAAACCCC") == pytest.approx(2 * single)
+
+def test_mfe_is_memoised():
+    FOLD_CACHE.clear()
+    hits = FOLD_CACHE.hits
+    mfe("GCGCGCAAAAGCGCGC")
+    mfe("GCGCGCAAAAGCGCGC")
+    assert FOLD_CACHE.hits == hits + 1
+
+def test_mfe_many_matches_mfe():
+    # Folding a batch of mixed lengths gives the same energies as folding each sequence alone
+    sequences = ["GGGGAAAACCCC", "GCGCGCAAAAGCGCGC", "ATATAAAAATATAT", "GGGGAAAACCCCTTGGGGAAAACCCC", "ACGT", "GGGGAAAACCCC"]
+    energies = mfe_many(sequences)
+    FOLD_CACHE.clear()
+    assert energies == [mfe(sequence) for sequence in sequences]
+
+def test_mfe_invalid_characters():
+    with pytest.raises(ValueError):
+        mfe("ACGTN")
+
+def test_fold_window():
+    assert fold_window("AAAA", "ATG" * 20, 6) == "AAAAATGATG"
+    assert fold_window("CCCCAAAA", "ATG" * 20, 3, upstream=2) == "AAATG"
+
+def test_chooser_prefers_unstructured_utr(make_chooser):
+    # Both options have the same first amino acids; the one that does not fold over the start codon wins
+    chooser = make_chooser([
+        UTROption(utr="GGGGCAAAAGCCCCAAAAAA", cds="ATGTCT", gene_name="Folded", first_six_aas="MS"),
+        UTROption(utr="CACTACATCACAATCACTAC", cds="ATGTCT", gene_name="Open", first_six_aas="MS"),
+    ])
+    assert chooser.structure_penalty(chooser.utrOptions[0], "ATGTCTGCGGGCGCTCGT", 3) == chooser.hairpin_score(chooser.utrOptions[0])
+    chooser.structure_model = "mfe"
+    assert chooser.select("ATGTCTGCGGGCGCTCGT", 3).gene_name == "Open"
+
+def test_chooser_fold_window():
+    # The initiation window limits the folded region under the "mfe" model too
+    chooser = UTRChooser()
+    utr, cds = "GGGGCAAAAGCCCCAAAAAA", "ATGTCTGCGGGCGCTCGT"
+    assert chooser.fold_window(utr, cds) == utr + cds
+    chooser.initiation_window = (6, 9)
+    assert chooser.fold_window(utr, cds) == "AAAAAA" + "ATGTCTGCG"
+
+def test_mfe_column_only_built_for_mfe_model(make_chooser):
+    # Under the default hairpin model, initiating the table does not fold any option
+    chooser = make_chooser([UTROption(utr="GGGGCAAAAGCCCCAAAAAA", cds="ATGTCT", gene_name="Folded", first_six_aas="MS")])
+    chooser.option_table.refresh()
+    assert 'mfe' not in chooser.option_table.columns
+    chooser.structure_model = "mfe"
+    chooser.option_table.refresh()
+    assert chooser.option_table.columns['mfe'][chooser.utrOptions[0]] < 0
@@ -1,5 +1,7 @@
+import random
 import pytest
-from checkers.forbidden_sequence_checker import ForbiddenSequenceChecker
+from bio_functions import reverse_complement
+from checkers.forbidden_sequence_checker import ForbiddenSequenceChecker, MismatchAutomaton
 
 @pytest.fixture
 def checker():
@@ -72,3 +74,40 @@ def test_check_forbidden_with_special_characters(checker):
     special_char_seq = "AAATAA$%&@#AATAA"
     with pytest.raises(ValueError):
         checker.run(special_char_seq)
+
+def test_approximate_hits(checker, capsys):
+    # One mismatch from AGGAGG on the forward strand and from AATAAA on the reverse strand
+    checker.mismatches = {"AGGAGG": 1, "AATAAA": 1}
+    seq = "CCAGGTGGCCC" + reverse_complement("AATCAA") + "CC"
+    assert checker.find_hits(seq) == [("AGGAGG", 1, 2, 1), ("AATAAA", -1, 11, 1)]
+    assert checker.find_sites(seq) == ["AATAAA", "AGGAGG"]
+    assert checker.run(seq) == False
+    assert capsys.readouterr().out == ""
+
+def test_exact_sites_with_budgets(checker):
+    # Sites without a budget still match exactly, on both strands
+    checker.mismatches = {"AGGAGG": 1}
+    assert checker.find_hits("CCGAATTCCC") == [("GAATTC", 1, 2, 0)]
+    assert checker.find_hits("CCTCTAGACC") == [("TCTAGA", 1, 2, 0)]
+    assert checker.run("GCGGGCGCTCGTTCGAGTATAAT") == True
+
+def test_automaton_matches_brute_force():
+    # Every window within budget is reported, with its mismatch count
+    rng = random.Random(0)
+    patterns = [("AGGAGG", 2), ("AATAAA", 1), ("GCGGCCGC", 3), ("ACGT", 0)]
+    automaton = MismatchAutomaton(patterns)
+    seq = ''.join(rng.choice("ACGT") for _ in range(2000)) + "N" + "AGGAGG"
+    expected = []
+    for end in range(len(seq)):
+        for index, (pattern, budget) in enumerate(patterns):
+            start = end - len(pattern) + 1
+            if start >= 0:
+                mismatches = sum(a != b for a, b in zip(seq[start:end + 1], pattern))
+                if mismatches <= budget:
+                    expected.append((index, start, mismatches))
+    assert automaton.search(seq) == expected
+
+def test_invalid_budgets(checker):
+    checker.mismatches = {"AGGAGG": 6}
+    with pytest.raises(ValueError):
+        checker.find_hits("ACGT")
@@ -0,0 +1,40 @@
+import os
+import pytest
+from genome_data_parsing import IntervalIndex, extract_genes_info, utr_window
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'data', 'fixture.gbff')
+
+@pytest.fixture
+def intervals():
+    # Three loci on a 1000 bp contig; geneB overlaps the end of geneA
+    return IntervalIndex([(100, 300, "geneA"), (280, 500, "geneB"), (700, 900, "geneC")])
+
+def test_upstream_limit(intervals):
+    assert intervals.upstream_limit(700, "geneC") == 500
+    assert intervals.upstream_limit(100, "geneA") == 0
+    # An overlapping neighbour leaves no intergenic space
+    assert intervals.upstream_limit(280, "geneB") == 280
+
+def test_downstream_limit(intervals):
+    assert intervals.downstream_limit(500, 1000, "geneB") == 700
+    assert intervals.downstream_limit(900, 1000, "geneC") == 1000
+    assert intervals.downstream_limit(300, 1000, "geneA") == 300
+
+def test_utr_window(intervals):
+    # Forward genes look upstream, reverse genes downstream, and clipping stops at the neighbouring locus
+    assert utr_window(700, 900, 1, 50, 1000) == (650, 700)
+    assert utr_window(700, 900, 1, 500, 1000) == (200, 700)
+    assert utr_window(700, 900, 1, 500, 1000, intervals, "geneC") == (500, 700)
+    assert utr_window(280, 500, -1, 500, 1000, intervals, "geneB") == (500, 700)
+    assert utr_window(700, 900, -1, 500, 1000, intervals, "geneC") == (900, 1000)
+
+def test_extract_utr_length():
+    # Longer windows extend the default 50 bp UTR upstream, and clipped windows never reach into a neighbour
+    default = extract_genes_info(FIXTURE)
+    longer = extract_genes_info(FIXTURE, utr_length=400)
+    clipped = extract_genes_info(FIXTURE, utr_length=400, clip=True)
+    for locus_tag, info in default.items():
+        assert len(info['UTR']) == 50
+        assert str(longer[locus_tag]['UTR']).endswith(str(info['UTR']))
+        assert str(longer[locus_tag]['UTR']).endswith(str(clipped[locus_tag]['UTR']))
+        assert len(clipped[locus_tag]['UTR']) < 400
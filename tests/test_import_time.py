@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_S = 0.3  # Generous: these imports take ~30 ms on a laptop
+HEAVY_MODULES = ["Bio", "pandas", "numpy"]
+
+def import_in_subprocess(modules):
+    # Import the modules in a fresh interpreter and report the time taken, the heavy modules loaded and any output
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"for name in {modules!r}: __import__(name)\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "sys.stderr.write(json.dumps({'elapsed': elapsed, 'loaded': loaded}))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return result.stdout, json.loads(result.stderr.strip().splitlines()[-1])
+
+def test_import_has_no_side_effects():
+    # Importing the design modules prints nothing and does not load Biopython, pandas or NumPy
+    stdout, report = import_in_subprocess(["design_utr", "design_primer", "genome_data_parsing", "design_pipeline"])
+    assert stdout == ""
+    assert report["loaded"] == []
+
+def test_import_time_budget():
+    # Importing the design modules stays within the import-time budget
+    _, report = import_in_subprocess(["design_utr", "design_primer", "genome_data_parsing", "design_pipeline", "service"])
+    assert report["elapsed"] < IMPORT_BUDGET_S
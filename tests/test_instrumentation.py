@@ -0,0 +1,62 @@
+import json
+import pstats
+import pytest
+import instrumentation
+from design_utr import UTROption
+from design_primer import PrimerDesigner
+
+@pytest.fixture
+def recorder():
+    # Every test starts with empty, disabled instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+    yield instrumentation.recorder
+    instrumentation.disable()
+    instrumentation.reset()
+
+@pytest.fixture
+def utr_chooser(make_chooser):
+    return make_chooser([
+        UTROption(utr="ACGGACGGTCCACCTAAAAAA", cds="ATGCATG", gene_name="GeneX", first_six_aas="MALQ"),
+        UTROption(utr="GGGGAAGG", cds="ATGCATG", gene_name="GeneY", first_six_aas="MALQ"),
+        UTROption(utr="AAAAAAAAAAAA", cds="ATGCATG", gene_name="GeneZ", first_six_aas="MALQ"),
+    ])
+
+def test_disabled_records_nothing(recorder, utr_chooser):
+    # Nothing is recorded unless instrumentation is enabled
+    utr_chooser.run("ATGTCTGCGGGCGCTCGTTCGAGTATAATC", 5, set())
+    assert instrumentation.report() == {"stages": {}, "counters": {}}
+
+def test_utr_chooser_counters(recorder, utr_chooser):
+    # Options scanned and rejected by each filter are counted, and each stage is timed
+    instrumentation.enable()
+    utr_chooser.run("ATGTCTGCGGGCGCTCGTTCGAGTATAATC", 5, set())
+    report = json.loads(instrumentation.dumps())
+
+    assert report["counters"]["UTRChooser.options_scanned"] == 3
+    assert report["counters"]["UTRChooser.rejected_kozak"] == 1
+    assert report["counters"]["UTRChooser.rejected_forbidden"] == 1
+    assert report["stages"]["UTRChooser.structure"]["calls"] == 1
+    assert report["stages"]["UTRChooser.run"]["calls"] == 1
+
+def test_tm_evaluations(recorder):
+    # Every melting temperature evaluation while adjusting a primer is counted
+    designer = PrimerDesigner()
+    designer.initiate()
+    instrumentation.enable()
+    designer._adjust_primer_length("ATATATATATATATATATATATATATATAT")
+    assert recorder.counters["PrimerDesigner.tm_evaluations"] == 10
+
+def test_listener_and_profile(recorder, utr_chooser, tmp_path):
+    # Listeners see every finished stage and profile() writes cProfile statistics
+    seen = []
+    instrumentation.add_listener(lambda name, start, duration: seen.append(name))
+    try:
+        with instrumentation.profile(str(tmp_path / "run.prof")):
+            utr_chooser.run("ATGTCTGCGGGCGCTCGTTCGAGTATAATC", 3, set())
+    finally:
+        recorder.listeners.clear()
+
+    assert "UTRChooser.run" in seen
+    assert not instrumentation.enabled
+    assert pstats.Stats(str(tmp_path / "run.prof")).total_calls > 0
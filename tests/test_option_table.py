@@ -0,0 +1,91 @@
+import pickle
+import pytest
+import instrumentation
+from design_utr import UTRChooser, UTROption, kozak_mismatches
+
+CDS = "ATGTCTGCGGGCGCTCGTTCGAGTATAATC"
+
+@pytest.fixture
+def counters():
+    # Instrumentation counts how much of the table each change recomputes
+    instrumentation.reset()
+    instrumentation.enable()
+    yield instrumentation.recorder.counters
+    instrumentation.disable()
+    instrumentation.reset()
+
+@pytest.fixture
+def utr_chooser(utr_chooser):
+    utr_chooser.option_table.refresh()
+    return utr_chooser
+
+def test_added_site_rescans_only_new_site(utr_chooser, counters):
+    # Adding a site searches every option for that one site only, and nothing else is rebuilt
+    assert utr_chooser.run(CDS, 3).gene_name == "GeneY"
+    utr_chooser.seq_checker.forbidden.append("CTTACC")
+    assert utr_chooser.run(CDS, 3).gene_name == "GeneX"
+    assert counters["OptionTable.sites_scanned"] == 2
+    assert not any(name.startswith("OptionTable.rebuilt") for name in counters)
+
+def test_removed_site(utr_chooser):
+    utr_chooser.seq_checker.forbidden.append("GGACGG")
+    assert utr_chooser.option_table.get('forbidden_sites')[utr_chooser.utrOptions[0]] == {"GGACGG"}
+    utr_chooser.seq_checker.forbidden.remove("GGACGG")
+    assert utr_chooser.option_table.get('forbidden_sites')[utr_chooser.utrOptions[0]] == set()
+
+def test_sites_match_checker(utr_chooser):
+    # The incremental column agrees with a full scan by the checker
+    utr_chooser.seq_checker.forbidden += ["CTTACC", "GGTAAG", "TTTTT"]
+    sites = utr_chooser.option_table.get('forbidden_sites')
+    for option in utr_chooser.utrOptions:
+        assert sites[option] == set(utr_chooser.seq_checker.find_sites(option.utr))
+    assert sites[utr_chooser.utrOptions[1]] == {"CTTACC", "GGTAAG"}
+
+def test_kozak_change_rebuilds_kozak_only(utr_chooser, counters):
+    utr_chooser.kozak_seq = 'aAaAaAATGTCa'
+    utr_chooser.option_table.refresh()
+    assert counters == {"OptionTable.rebuilt.kozak_mismatches": 1}
+
+def test_poly_a_change(utr_chooser, counters):
+    utr_chooser.poly_a_tail_length = 5
+    assert utr_chooser.run(CDS, 3).utr == "GCAGCTCTTACCTACTTCAG" + "A" * 5
+    assert counters["OptionTable.rebuilt.poly_a"] == 1
+
+def test_new_options_rebuild(utr_chooser, counters):
+    # Replacing the options invalidates every column
+    utr_chooser.utrOptions = utr_chooser.utrOptions[1:]
+    utr_chooser.option_table.refresh()
+    assert counters["OptionTable.rebuilt.forbidden_sites"] == 1
+    assert counters["OptionTable.rebuilt.kozak_mismatches"] == 1
+
+def test_kozak_mismatches():
+    assert kozak_mismatches('aAaAaAATGTCt', "AAAAAA") == []
+    assert kozak_mismatches('aAaAaAATGTCt', "CACAAA") == [False, False]
+    assert kozak_mismatches('aAaAaAATGTCt', "ATGTCA", 6) == [False]
+    assert kozak_mismatches('aAaAaAATGTCt', "ATGACT", 6) == [True]
+
+def test_mismatch_budgets_rebuild_sites(utr_chooser, counters):
+    # GeneY's CTTACC is one mismatch from CTTACG, so it is only rejected once that site has a budget
+    utr_chooser.seq_checker.forbidden.append("CTTACG")
+    assert utr_chooser.run(CDS, 3).gene_name == "GeneY"
+    utr_chooser.seq_checker.mismatches = {"CTTACG": 1}
+    assert utr_chooser.run(CDS, 3).gene_name == "GeneX"
+    assert counters["OptionTable.rebuilt.forbidden_sites"] == 1
+
+def test_option_replaced_in_place(utr_chooser):
+    # Replacing an option without changing the list's identity or length still refreshes every column
+    assert utr_chooser.run(CDS, 3).gene_name == "GeneY"
+    fingerprint = utr_chooser.option_table.fingerprint()
+    utr_chooser.utrOptions[1] = UTROption(utr="GCAGCTCTTACCTACTTCTT", cds="ATGCATG", gene_name="GeneZ", first_six_aas="MSAG")
+    assert utr_chooser.run(CDS, 3).gene_name == "GeneZ"
+    assert utr_chooser.option_table.fingerprint() != fingerprint
+
+def test_initiated_chooser_pickles():
+    # Worker processes started with spawn receive the chooser by pickling
+    chooser = UTRChooser()
+    chooser.genbank_file = "benchmarks/data/fixture.gbff"
+    chooser.initiate()
+    copy = pickle.loads(pickle.dumps(chooser))
+    assert copy.utrOptions == chooser.utrOptions
+    assert copy.option_table.chooser is copy
+    assert copy.option_table.get('poly_a') == chooser.option_table.get('poly_a')
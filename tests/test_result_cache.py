@@ -0,0 +1,71 @@
+import pickle
+import pytest
+import result_cache
+from result_cache import ResultCache
+from design_utr import UTROption, _option_from_json, _option_to_json
+
+CDS = "ATGTCTGCGGGCGCTCGTTCGAGTATAATC"
+
+def test_lru_eviction():
+    cache = ResultCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.put("c", 3)  # Evicts "b", the least recently used
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3, 'evictions': 1, 'expirations': 0, 'size': 2}
+
+def test_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    cache = ResultCache(ttl=10)
+    cache.put("a", 1)
+    now[0] += 5
+    assert cache.get("a") == (True, 1)
+    now[0] += 6
+    assert cache.get("a") == (False, None)
+    assert cache.stats()['expirations'] == 1
+
+def test_disk_store_shared(tmp_path):
+    # A second cache on the same database (as in another process) sees the first cache's results
+    path = str(tmp_path / "results.sqlite")
+    first = ResultCache(path=path, encode=_option_to_json, decode=_option_from_json)
+    option = UTROption(utr="ACGT", cds="ATGCATG", gene_name="GeneX", first_six_aas="MALQ")
+    first.put("key", option)
+    first.put("none", None)
+    second = pickle.loads(pickle.dumps(first))
+    assert second.stats()['size'] == 0
+    assert second.get("key") == (True, option)
+    assert second.get("none") == (True, None)
+    first.close()
+    second.close()
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        ResultCache(maxsize=0)
+
+def test_chooser_shares_n_terminus(utr_chooser):
+    # Variants that only differ after the first 18 bases share one 3' result
+    utr_chooser.enable_result_cache()
+    first = utr_chooser.run(CDS, 3, set())
+    variant = CDS[:18] + "GCTGCTGCTGCT"
+    assert utr_chooser.run(variant, 3, set()) == first
+    assert utr_chooser.result_cache.stats()['hits'] == 1
+    assert utr_chooser.result_cache.stats()['misses'] == 1
+
+def test_chooser_settings_change_key(utr_chooser):
+    # Changing a design rule or the ignore set never returns a stale result
+    utr_chooser.enable_result_cache()
+    assert utr_chooser.run(CDS, 3, set()).gene_name == "GeneY"
+    utr_chooser.seq_checker.forbidden.append("CTTACC")
+    assert utr_chooser.run(CDS, 3, set()).gene_name == "GeneX"
+    utr_chooser.poly_a_tail_length = 3
+    assert utr_chooser.run(CDS, 3, set()).utr.endswith("AAAAAAAAA")
+    assert utr_chooser.run(CDS, 3, {utr_chooser.utrOptions[0]}) is None
+    assert utr_chooser.result_cache.stats()['hits'] == 0
+
+def test_chooser_without_cache(utr_chooser):
+    # Caching is off unless enabled, so every query draws the Kozak check again
+    assert utr_chooser.result_cache is None
+    assert utr_chooser.run(CDS, 3, set()).gene_name == "GeneY"
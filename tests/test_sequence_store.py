@@ -0,0 +1,96 @@
+import os
+import pickle
+import pytest
+from genome_data_parsing import extract_genes_info
+from sequence_store import SequenceStore, build_sequence_store
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'data', 'fixture.gbff')
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "genome.2bit")
+    build_sequence_store(FIXTURE, path)
+    with SequenceStore(path) as store:
+        yield store
+
+def test_matches_genbank_parsing(store):
+    # The store returns the same UTRs and CDSs as extract_genes_info
+    expected = extract_genes_info(FIXTURE)
+    genes = store.genes_info()
+    assert set(genes) == set(expected)
+    for locus_tag, info in expected.items():
+        assert genes[locus_tag] == {'gene': info['gene'], 'UTR': str(info['UTR']), 'CDS': str(info['CDS'])}
+
+def test_fetch_any_region(store):
+    # Regions starting and ending at every offset within a packed byte decode correctly
+    from Bio import SeqIO
+    record = next(SeqIO.parse(FIXTURE, "genbank"))
+    sequence = str(record.seq)
+    for start in range(0, 9):
+        for end in range(start, start + 9):
+            assert store.fetch(record.id, start, end) == sequence[start:end]
+    assert store.fetch(record.id, len(sequence) - 10, len(sequence) + 10) == sequence[-10:]
+    assert store.fetch(record.id, -5, 3) == sequence[:3]
+
+def test_utr_length(store):
+    # UTR windows of any length can be fetched, on the gene's own strand
+    short, long = store.utr("YGR192C", 20), store.utr("YGR192C", 120)
+    assert len(long) == 120
+    assert long.endswith(short)
+    assert store.utr("YHR174W", 100).endswith(store.utr("YHR174W", 50))
+
+def test_non_acgt_bases(tmp_path):
+    # Ambiguous bases survive the 2-bit packing
+    from Bio.Seq import Seq
+    from Bio.SeqRecord import SeqRecord
+    from Bio import SeqIO
+    genbank = str(tmp_path / "ambiguous.gb")
+    record = SeqRecord(Seq("ACGTNNNNACGTRYACGT"), id="AMB1", name="AMB1", annotations={'molecule_type': 'DNA'})
+    SeqIO.write([record], genbank, "genbank")
+    path = str(tmp_path / "ambiguous.2bit")
+    build_sequence_store(genbank, path)
+    with SequenceStore(path) as store:
+        assert store.fetch("AMB1", 0, 18) == "ACGTNNNNACGTRYACGT"
+        assert store.fetch("AMB1", 6, 13) == "NNACGTR"
+        assert store.fetch("AMB1", 2, 6, -1) == "NNAC"
+
+def test_pickle_reopens(store):
+    # A pickled store is reopened from its path rather than copied
+    data = pickle.dumps(store)
+    assert len(data) < 200
+    copy = pickle.loads(data)
+    assert copy.cds("YKL060C") == store.cds("YKL060C")
+    copy.close()
+
+def test_unknown_names(store):
+    with pytest.raises(ValueError):
+        store.cds("NOTAGENE")
+    with pytest.raises(ValueError):
+        store.fetch("NOTACONTIG", 0, 10)
+
+def test_chooser_from_store(store):
+    # UTRChooser loads the same options from the store as from the GenBank file
+    from design_utr import UTRChooser
+    from_genbank = UTRChooser()
+    from_genbank.genbank_file = FIXTURE
+    from_genbank.initiate()
+    from_store = UTRChooser()
+    from_store.sequence_store = store.path
+    from_store.initiate()
+    assert from_store.utrOptions == from_genbank.utrOptions
+
+def test_clipped_windows_match_genbank_parsing(store):
+    # Windows computed from the stored coordinates match re-parsing the GenBank file
+    for utr_length in (30, 400):
+        expected = extract_genes_info(FIXTURE, utr_length, clip=True)
+        genes = store.genes_info(utr_length, clip=True)
+        for locus_tag, info in expected.items():
+            assert genes[locus_tag]['UTR'] == str(info['UTR'])
+
+def test_utr_windows(store):
+    windows = store.utr_windows(1000)
+    assert set(windows) == set(store.features)
+    for locus_tag, (contig, start, end, strand) in windows.items():
+        feature = store.features[locus_tag]
+        assert 0 < end - start < 1000
+        assert (end == feature['start']) if strand == 1 else (start == feature['end'])
@@ -0,0 +1,83 @@
+import asyncio
+import json
+from service import DesignService, load_descriptors
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(data)
+
+def serve(scenario, descriptors=None):
+    # Run a scenario against a service listening on an ephemeral port
+    async def main():
+        service = DesignService(descriptors, workers=1, batch_window=0.01)
+        server = await service.start(port=0)
+        try:
+            return await scenario(service, server.sockets[0].getsockname()[1])
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+def test_load_descriptors():
+    # Only function descriptors are loaded; prompts.json is skipped
+    descriptors = load_descriptors()
+    assert "org.c9.function.bioe_134.DNA.translate" in descriptors
+    assert all(descriptor["type"] == "function" for descriptor in descriptors.values())
+
+def test_call_translate():
+    # Functions are called by descriptor id with named arguments
+    async def scenario(service, port):
+        return await request(port, "POST", "/call", {"function_id": "org.c9.function.bioe_134.DNA.translate", "arguments": {"sequence": "ATGGCC"}})
+    assert serve(scenario) == (200, {"result": "MA"})
+
+def test_call_errors():
+    # Unknown functions are 404s and function errors are reported as 422s
+    async def scenario(service, port):
+        missing = await request(port, "POST", "/call", {"function_id": "nope", "arguments": {}})
+        invalid = await request(port, "POST", "/call", {"function_id": "org.c9.function.bioe_134.DNA.reverse_complement", "arguments": {"sequence": "ATXG"}})
+        return missing, invalid
+    missing, invalid = serve(scenario)
+    assert missing[0] == 404
+    assert invalid[0] == 422 and "invalid characters" in invalid[1]["error"]
+
+def test_coalescing_and_metrics():
+    # Concurrent identical calls share one execution and are batched together
+    async def scenario(service, port):
+        call = {"function_id": "org.c9.function.bioe_134.DNA.reverse_complement", "arguments": {"sequence": "ATGC"}}
+        other = {"function_id": "org.c9.function.bioe_134.DNA.reverse_complement", "arguments": {"sequence": "AATT"}}
+        responses = await asyncio.gather(*(request(port, "POST", "/call", call) for _ in range(4)), request(port, "POST", "/call", other))
+        return responses, (await request(port, "GET", "/metrics"))[1]
+    responses, metrics = serve(scenario)
+
+    assert [response[1]["result"] for response in responses] == ["GCAT"] * 4 + ["AATT"]
+    # Coalesced calls are served calls too
+    assert metrics["completed"] == 5
+    assert metrics["requests"] == {"org.c9.function.bioe_134.DNA.reverse_complement": 5}
+    assert metrics["coalesced"] == 3
+    assert metrics["batches"] == 1
+    assert metrics["latency_ms"]["p50"] is not None
+
+def test_failing_call_isolated():
+    # An unexpected error in one call does not fail the other calls batched with it
+    descriptors = load_descriptors()
+    descriptors["listdir"] = {"id": "listdir", "type": "function", "inputs": [{"name": "path", "type": "string"}],
+                              "execution_details": {"source": "os.py", "execution": "listdir(path)"}}
+    async def scenario(service, port):
+        return await asyncio.gather(
+            request(port, "POST", "/call", {"function_id": "listdir", "arguments": {"path": "missing/directory"}}),
+            request(port, "POST", "/call", {"function_id": "org.c9.function.bioe_134.DNA.translate", "arguments": {"sequence": "ATGGCC"}}),
+        )
+    failed, translated = serve(scenario, descriptors)
+    assert failed[0] == 422 and failed[1]["error"].startswith("FileNotFoundError")
+    assert translated == (200, {"result": "MA"})
+
+def test_body_not_an_object():
+    async def scenario(service, port):
+        return await request(port, "POST", "/call", [])
+    status, payload = serve(scenario)
+    assert status == 400 and "JSON object" in payload["error"]
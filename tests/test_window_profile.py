@@ -0,0 +1,36 @@
+import random
+import pytest
+from bio_functions import hairpin_counter, window_profile
+from design_utr import UTRChooser, UTROption
+
+def _gc(sequence):
+    return (sequence.count('G') + sequence.count('C')) / len(sequence)
+
+def test_window_profile_matches_hairpin_counter():
+    # Every window reports the same count as hairpin_counter on that window, including windows shorter than a hairpin
+    rng = random.Random(34)
+    sequence = ''.join(rng.choice('ACGT') for _ in range(300))
+    for window in (5, 15, 16, 40):
+        for step in (1, 7):
+            expected = [(start, hairpin_counter(sequence[start:start + window])[0], _gc(sequence[start:start + window]))
+                        for start in range(0, len(sequence) - window + 1, step)]
+            assert list(window_profile(sequence, window, step)) == expected
+
+def test_window_profile_short_sequence():
+    # A sequence shorter than the window is reported as one window
+    assert list(window_profile("GGGAAAATCCC", 50)) == [(0, hairpin_counter("GGGAAAATCCC")[0], 6 / 11)]
+    assert list(window_profile("", 10)) == []
+
+def test_window_profile_invalid_window():
+    with pytest.raises(ValueError):
+        list(window_profile("ACGT", 0))
+    with pytest.raises(ValueError):
+        list(window_profile("ACGT", 2, step=0))
+
+def test_chooser_initiation_window():
+    # Hairpins far downstream of the start codon are ignored when only the initiation region is scored
+    chooser = UTRChooser()
+    option = UTROption(utr="AAAAAAAAAA", cds="ATGTCT" + "A" * 60 + "GGGAAAACCC", gene_name="GeneX", first_six_aas="MS")
+    assert chooser.hairpin_score(option) == 1
+    chooser.initiation_window = (10, 30)
+    assert chooser.hairpin_score(option) == 0
@@ -1,10 +1,14 @@
 class Step:
+    __slots__ = ('operation', 'output')
+
     def __init__(self, operation, output):
         self.operation = operation
         self.output = output
 
 
 class PCR(Step):
+    __slots__ = ('forward_oligo', 'reverse_oligo', 'template', 'product_size')
+
     def __init__(self, forward_oligo, reverse_oligo, template, output, product_size=None):
         super().__init__('PCR', output)
         self.forward_oligo = forward_oligo
@@ -14,6 +18,8 @@ class PCR(Step):
 
 
 class Digest(Step):
+    __slots__ = ('dna', 'enzymes', 'fragSelect', 'product_size')
+
     def __init__(self, dna, enzymes, fragSelect, output, product_size=None):
         super().__init__('Digest', output)
         self.dna = dna
@@ -23,12 +29,16 @@ class Digest(Step):
 
 
 class Ligate(Step):
+    __slots__ = ('dnas',)
+
     def __init__(self, dnas, output):
         super().__init__('Ligate', output)
         self.dnas = dnas
 
 
 class GoldenGate(Step):
+    __slots__ = ('dnas', 'enzyme')
+
     def __init__(self, dnas, enzyme, output):
         super().__init__('GoldenGate', output)
         self.dnas = dnas
@@ -36,12 +46,16 @@ class GoldenGate(Step):
 
 
 class Gibson(Step):
+    __slots__ = ('dnas',)
+
     def __init__(self, dnas, output):
         super().__init__('Gibson', output)
         self.dnas = dnas
 
 
 class Transform(Step):
+    __slots__ = ('dna', 'strain', 'antibiotics', 'temperature')
+
     def __init__(self, dna, strain, antibiotics, output, temperature=None):
         super().__init__('Transform', output)
         self.dna = dna
@@ -50,6 +64,8 @@ class Transform(Step):
         self.temperature = temperature
 
 class ConstructionFile:
+    __slots__ = ('steps', 'sequences')
+
     def __init__(self, steps, sequences):
         self.steps = steps
         self.sequences = sequences
\ No newline at end of file
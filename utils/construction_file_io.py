@@ -0,0 +1,365 @@
+"""
+Readers and writers for ConstructionFile objects.
+
+Two formats are supported:
+
+- Text (``.cf``): human readable. Each construction file is a block of tab-separated step lines
+  (operation followed by the step's fields), then FASTA-style ``>name`` / sequence lines, terminated by ``//``.
+  Lists are comma-separated and missing values are written as ``-``.
+- Binary (``.cfb``): compact stream for bulk storage. After the ``CFB1`` magic, the stream is a sequence of
+  records. Names and sequences live in shared tables that every construction file in the stream refers to
+  by index; an entry is emitted the first time it is used, so identical sequences (templates, vectors,
+  common oligos) are stored once no matter how many construction files use them. Sequences made only of
+  A/C/G/T are 2-bit packed.
+
+Both formats are streamed: writers append one construction file at a time and readers are generators, so
+files of any size can be processed in bounded memory (apart from the shared tables).
+
+List fields are normalised on the way through: a single name given as a string (e.g. ``Digest.enzymes="EcoRI"``)
+is read back as a one-element list. Integer fields must not be negative.
+"""
+import hashlib
+import struct
+from utils.construction_file import PCR, Digest, Ligate, GoldenGate, Gibson, Transform, ConstructionFile
+
+# Field layout per operation, in constructor order: s = string, l = list of strings, i = optional int, n = optional number
+STEP_FIELDS = {
+    'PCR': (PCR, (('forward_oligo', 's'), ('reverse_oligo', 's'), ('template', 's'), ('output', 's'), ('product_size', 'i'))),
+    'Digest': (Digest, (('dna', 's'), ('enzymes', 'l'), ('fragSelect', 'i'), ('output', 's'), ('product_size', 'i'))),
+    'Ligate': (Ligate, (('dnas', 'l'), ('output', 's'))),
+    'GoldenGate': (GoldenGate, (('dnas', 'l'), ('enzyme', 's'), ('output', 's'))),
+    'Gibson': (Gibson, (('dnas', 'l'), ('output', 's'))),
+    'Transform': (Transform, (('dna', 's'), ('strain', 's'), ('antibiotics', 'l'), ('output', 's'), ('temperature', 'n'))),
+}
+OPERATIONS = list(STEP_FIELDS)
+
+MAGIC = b'CFB1'
+_STRING, _SEQUENCE, _CONSTRUCTION_FILE = b'N', b'S', b'C'
+_PACKED, _RAW = 0, 1
+_PACK = str.maketrans('ACGT', '0123')
+_DIGITS = set('0123')
+_UNPACK = [''.join('ACGT'[(byte >> shift) & 3] for shift in (6, 4, 2, 0)) for byte in range(256)]
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value)
+
+def _check_int(value):
+    if value is not None and value < 0:
+        raise ValueError(f"Negative value {value} cannot be written to a construction file.")
+    return value
+
+def _check_text(value):
+    if any(char in value for char in '\t\n,') or value in ('', '-'):
+        raise ValueError(f"Value {value!r} cannot be written to the text format.")
+    return value
+
+# ---------------------------------------------------------------- text format
+
+def write_text(construction_files, handle):
+    """
+    Write construction files to an open text handle.
+
+    Parameters:
+        construction_files (iterable): The ConstructionFile instances to write.
+        handle (file): A text file opened for writing.
+    """
+    for cf in construction_files:
+        for step in cf.steps:
+            if step.operation not in STEP_FIELDS:
+                raise ValueError(f"Unsupported operation: {step.operation}")
+            columns = [step.operation]
+            for name, kind in STEP_FIELDS[step.operation][1]:
+                value = getattr(step, name)
+                if value is None:
+                    columns.append('-')
+                elif kind == 'l':
+                    columns.append(','.join(_check_text(item) for item in _as_list(value)))
+                elif kind == 's':
+                    columns.append(_check_text(value))
+                else:
+                    columns.append(str(_check_int(value) if kind == 'i' else value))
+            handle.write('\t'.join(columns) + '\n')
+        for name, sequence in cf.sequences.items():
+            handle.write(f">{_check_text(name)}\n{sequence}\n")
+        handle.write('//\n')
+
+def read_text(handle):
+    """
+    Stream construction files from an open text handle.
+
+    Parameters:
+        handle (file): A text file opened for reading.
+
+    Yields:
+        ConstructionFile: The construction files in the order they were written.
+    """
+    steps, sequences, name = [], {}, None
+    for line in handle:
+        line = line.rstrip('\n')
+        if not line:
+            continue
+        if line == '//':
+            yield ConstructionFile(steps, sequences)
+            steps, sequences, name = [], {}, None
+        elif line.startswith('>'):
+            name = line[1:]
+            sequences[name] = ''
+        elif name is not None:
+            sequences[name] += line
+        else:
+            columns = line.split('\t')
+            if columns[0] not in STEP_FIELDS:
+                raise ValueError(f"Unsupported operation: {columns[0]}")
+            cls, fields = STEP_FIELDS[columns[0]]
+            if len(columns) != len(fields) + 1:
+                raise ValueError(f"{columns[0]} step expects {len(fields)} fields, found {len(columns) - 1}.")
+            values = {}
+            for (field, kind), text in zip(fields, columns[1:]):
+                if text == '-':
+                    values[field] = None
+                elif kind == 'l':
+                    values[field] = text.split(',')
+                elif kind == 'i':
+                    values[field] = int(text)
+                elif kind == 'n':
+                    # Integers stay integers; anything else (37.5, 1e+20, inf) is a float
+                    try:
+                        values[field] = int(text)
+                    except ValueError:
+                        values[field] = float(text)
+                else:
+                    values[field] = text
+            steps.append(cls(**values))
+    if steps or sequences:
+        raise ValueError("Construction file is missing its '//' terminator.")
+
+# -------------------------------------------------------------- binary format
+
+def pack_sequence(sequence):
+    """
+    Encode a DNA sequence, 2-bit packing it when it only contains A, C, G and T.
+
+    Parameters:
+        sequence (str): The DNA sequence.
+
+    Returns:
+        tuple: (encoding flag, bytes).
+    """
+    digits = sequence.translate(_PACK)
+    if not digits or not set(digits) <= _DIGITS:
+        return _RAW, sequence.encode('ascii')
+    padded = digits + '0' * (-len(digits) % 4)
+    return _PACKED, int(padded, 4).to_bytes(len(padded) // 4, 'big')
+
+def unpack_sequence(flag, data, length):
+    """
+    Decode a sequence produced by pack_sequence.
+
+    Parameters:
+        flag (int): The encoding flag.
+        data (bytes): The encoded sequence.
+        length (int): Number of bases in the sequence.
+
+    Returns:
+        str: The DNA sequence.
+    """
+    if flag == _RAW:
+        return data.decode('ascii')
+    return ''.join([_UNPACK[byte] for byte in data])[:length]
+
+def _write_varint(handle, value):
+    while value >= 0x80:
+        handle.write(bytes(((value & 0x7F) | 0x80,)))
+        value >>= 7
+    handle.write(bytes((value,)))
+
+def _read_varint(handle):
+    value, shift = 0, 0
+    while True:
+        byte = handle.read(1)
+        if not byte:
+            raise ValueError("Unexpected end of construction file stream.")
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+class ConstructionFileWriter:
+    """
+    Streams construction files to the binary format, storing each distinct name and sequence once.
+
+    Attributes:
+        handle (file): The binary file being written.
+        strings (dict): Name -> index in the shared string table.
+        sequences (dict): Sequence digest -> index in the shared sequence table.
+    """
+    def __init__(self, handle):
+        """
+        Parameters:
+            handle (file): A file opened for binary writing.
+        """
+        self.handle = handle
+        self.strings = {}
+        self.sequences = {}
+        handle.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.handle.flush()
+
+    def _string(self, value):
+        if value not in self.strings:
+            data = value.encode('utf-8')
+            self.handle.write(_STRING)
+            _write_varint(self.handle, len(data))
+            self.handle.write(data)
+            self.strings[value] = len(self.strings)
+        return self.strings[value]
+
+    def _sequence(self, sequence):
+        # Key long sequences by digest so the table does not hold a second copy of every genome-sized entry
+        key = hashlib.blake2b(sequence.encode('ascii'), digest_size=16).digest() if len(sequence) > 32 else sequence
+        if key not in self.sequences:
+            flag, data = pack_sequence(sequence)
+            self.handle.write(_SEQUENCE)
+            _write_varint(self.handle, len(sequence))
+            self.handle.write(bytes((flag,)))
+            _write_varint(self.handle, len(data))
+            self.handle.write(data)
+            self.sequences[key] = len(self.sequences)
+        return self.sequences[key]
+
+    def write(self, cf):
+        """
+        Append one construction file to the stream.
+
+        Parameters:
+            cf (ConstructionFile): The construction file to write.
+        """
+        # Table entries have to precede the record that uses them, so resolve indices first
+        steps = []
+        for step in cf.steps:
+            if step.operation not in STEP_FIELDS:
+                raise ValueError(f"Unsupported operation: {step.operation}")
+            values = []
+            for name, kind in STEP_FIELDS[step.operation][1]:
+                value = getattr(step, name)
+                if kind == 's':
+                    values.append(self._string(value))
+                elif kind == 'l':
+                    values.append([self._string(item) for item in _as_list(value)])
+                elif kind == 'i':
+                    values.append(_check_int(value))
+                else:
+                    values.append(value)
+            steps.append((OPERATIONS.index(step.operation), values))
+        sequences = [(self._string(name), self._sequence(str(sequence))) for name, sequence in cf.sequences.items()]
+
+        handle = self.handle
+        handle.write(_CONSTRUCTION_FILE)
+        _write_varint(handle, len(steps))
+        for code, values in steps:
+            handle.write(bytes((code,)))
+            for (name, kind), value in zip(STEP_FIELDS[OPERATIONS[code]][1], values):
+                if kind == 's':
+                    _write_varint(handle, value)
+                elif kind == 'l':
+                    _write_varint(handle, len(value))
+                    for item in value:
+                        _write_varint(handle, item)
+                elif kind == 'i':
+                    _write_varint(handle, 0 if value is None else value + 1)
+                elif value is None:
+                    handle.write(b'\x00')
+                else:
+                    handle.write(b'\x01' + struct.pack('<d', value))
+        _write_varint(handle, len(sequences))
+        for name, sequence in sequences:
+            _write_varint(handle, name)
+            _write_varint(handle, sequence)
+
+def read_binary(handle):
+    """
+    Stream construction files from the binary format.
+
+    Parameters:
+        handle (file): A file opened for binary reading.
+
+    Yields:
+        ConstructionFile: The construction files in the order they were written.
+    """
+    if handle.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary construction file stream.")
+    strings, sequences = [], []
+    while True:
+        tag = handle.read(1)
+        if not tag:
+            return
+        if tag == _STRING:
+            strings.append(handle.read(_read_varint(handle)).decode('utf-8'))
+        elif tag == _SEQUENCE:
+            length = _read_varint(handle)
+            flag = handle.read(1)[0]
+            sequences.append(unpack_sequence(flag, handle.read(_read_varint(handle)), length))
+        elif tag == _CONSTRUCTION_FILE:
+            steps = []
+            for _ in range(_read_varint(handle)):
+                cls, fields = STEP_FIELDS[OPERATIONS[handle.read(1)[0]]]
+                values = {}
+                for name, kind in fields:
+                    if kind == 's':
+                        values[name] = strings[_read_varint(handle)]
+                    elif kind == 'l':
+                        values[name] = [strings[_read_varint(handle)] for _ in range(_read_varint(handle))]
+                    elif kind == 'i':
+                        value = _read_varint(handle)
+                        values[name] = None if value == 0 else value - 1
+                    elif handle.read(1) == b'\x00':
+                        values[name] = None
+                    else:
+                        values[name] = struct.unpack('<d', handle.read(8))[0]
+                steps.append(cls(**values))
+            cf_sequences = {}
+            for _ in range(_read_varint(handle)):
+                name = strings[_read_varint(handle)]
+                cf_sequences[name] = sequences[_read_varint(handle)]
+            yield ConstructionFile(steps, cf_sequences)
+        else:
+            raise ValueError(f"Unknown record type {tag!r} in construction file stream.")
+
+# ------------------------------------------------------------- convenience API
+
+def save(construction_files, path):
+    """
+    Write construction files to disk, choosing the format from the extension ('.cfb' for binary, otherwise text).
+
+    Parameters:
+        construction_files (iterable): The ConstructionFile instances to write.
+        path (str): The destination file.
+    """
+    if path.endswith('.cfb'):
+        with open(path, 'wb') as handle, ConstructionFileWriter(handle) as writer:
+            for cf in construction_files:
+                writer.write(cf)
+    else:
+        with open(path, 'w') as handle:
+            write_text(construction_files, handle)
+
+def load(path):
+    """
+    Stream construction files from disk, choosing the format from the extension ('.cfb' for binary, otherwise text).
+
+    Parameters:
+        path (str): The file to read.
+
+    Yields:
+        ConstructionFile: The construction files stored in the file.
+    """
+    if path.endswith('.cfb'):
+        with open(path, 'rb') as handle:
+            yield from read_binary(handle)
+    else:
+        with open(path) as handle:
+            yield from read_text(handle)
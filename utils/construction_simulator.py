@@ -0,0 +1,451 @@
+from dataclasses import dataclass
+from bio_functions import reverse_complement
+from utils.construction_file import PCR, Digest, Ligate, GoldenGate, Gibson, Transform
+
+@dataclass(frozen=True)
+class Product:
+    """
+    A DNA molecule consumed or produced by a construction step.
+
+    Attributes:
+        sequence (str): The top-strand sequence, including any single-stranded overhangs at the ends.
+        circular (bool): Whether the molecule is circular.
+        overhangs (tuple): Lengths of the sticky (left, right) overhangs of a linear molecule: positive for 5'
+            overhangs, negative for 3' overhangs and 0 for blunt ends.
+    """
+    sequence: str
+    circular: bool = False
+    overhangs: tuple = (0, 0)
+
+    @property
+    def size(self):
+        """
+        Returns:
+            int: The length of the molecule in base pairs.
+        """
+        return len(self.sequence)
+
+class ConstructionSimulator:
+    """
+    A class to execute a ConstructionFile step by step and compute the sequence of every intermediate
+    and final product.
+
+    Steps are arranged into a dependency graph so that steps which do not depend on each other can be
+    simulated in parallel, and each step's product is memoised on the simulator so that a step shared by
+    many construction files (same operation, same inputs, same parameters) is only simulated once.
+
+    Attributes:
+        enzymes (dict): Restriction enzyme name -> (recognition site, top-strand cut, bottom-strand cut),
+            with cut positions counted from the first base of the recognition site.
+        anneal_length (int): Number of 3' bases of an oligo used to locate its binding site on a template.
+        gibson_overlap (int): Minimum homology (bp) required to join two fragments in a Gibson assembly.
+        cache (dict): Memoised step products, keyed by (operation, parameters, input products, settings), so
+            changing the enzyme table or the annealing or assembly settings never returns a stale product.
+    """
+    def __init__(self):
+        """
+        Initializes the ConstructionSimulator with an empty enzyme table and product cache.
+        """
+        self.enzymes = {}
+        self.cache = {}
+
+    def initiate(self):
+        """
+        Initialize the enzyme table and the default annealing and assembly settings.
+        """
+        self.enzymes = {
+            "BsaI": ("GGTCTC", 7, 11),
+            "BsmBI": ("CGTCTC", 7, 11),
+            "Esp3I": ("CGTCTC", 7, 11),
+            "BbsI": ("GAAGAC", 8, 12),
+            "AarI": ("CACCTGC", 11, 15),
+            "SapI": ("GCTCTTC", 8, 11),
+            "EcoRI": ("GAATTC", 1, 5),
+            "MfeI": ("CAATTG", 1, 5),
+            "BamHI": ("GGATCC", 1, 5),
+            "BglII": ("AGATCT", 1, 5),
+            "SpeI": ("ACTAGT", 1, 5),
+            "XbaI": ("TCTAGA", 1, 5),
+            "XhoI": ("CTCGAG", 1, 5),
+            "PstI": ("CTGCAG", 5, 1),
+            "HindIII": ("AAGCTT", 1, 5),
+            "NotI": ("GCGGCCGC", 2, 6),
+        }
+        self.anneal_length = 18
+        self.gibson_overlap = 15
+        self.cache = {}
+
+    def run(self, construction_file, circular=(), workers=1):
+        """
+        Simulate every step of a construction file.
+
+        Parameters:
+            construction_file (ConstructionFile): The steps to execute; its sequences map names to DNA strings.
+            circular (iterable): Names of input sequences that are circular (e.g. plasmids).
+            workers (int): Number of processes used to simulate independent steps; 1 runs serially.
+
+        Returns:
+            dict: Output name -> Product for every step in the construction file.
+        """
+        products = {}
+        for name, sequence in construction_file.sequences.items():
+            products[name] = Product(str(sequence).upper(), name in circular)
+
+        levels = self._schedule(construction_file.steps, products)
+        settings = (self.enzymes, self.anneal_length, self.gibson_overlap)
+        settings_key = (tuple(sorted(self.enzymes.items())), self.anneal_length, self.gibson_overlap)
+        executor = None
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=workers)
+        outputs = {}
+        try:
+            for level in levels:
+                pending = {}
+                for step in level:
+                    inputs = tuple(products[name] for name in _step_inputs(step))
+                    key = (step.operation, _step_params(step), inputs, settings_key)
+                    if key in self.cache or key in pending:
+                        continue
+                    if executor is None:
+                        self.cache[key] = _simulate_step(step.operation, key[1], inputs, settings)
+                    else:
+                        pending[key] = executor.submit(_simulate_step, step.operation, key[1], inputs, settings)
+                for key, future in pending.items():
+                    self.cache[key] = future.result()
+                for step in level:
+                    inputs = tuple(products[name] for name in _step_inputs(step))
+                    product = self.cache[(step.operation, _step_params(step), inputs, settings_key)]
+                    products[step.output] = product
+                    outputs[step.output] = product
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return outputs
+
+    def _schedule(self, steps, products):
+        """
+        Group steps into levels of the dependency graph; every step in a level only depends on input
+        sequences or on outputs of earlier levels.
+
+        Parameters:
+            steps (list): The Step instances of a construction file.
+            products (dict): The input sequences available before any step runs.
+
+        Returns:
+            list: A list of levels, each a list of Step instances that can be simulated independently.
+        """
+        producers = {}
+        for step in steps:
+            if step.output in producers or step.output in products:
+                raise ValueError(f"Output {step.output} is produced more than once.")
+            producers[step.output] = step
+
+        depth = {}
+        def step_depth(step, visiting):
+            if step.output in depth:
+                return depth[step.output]
+            if step.output in visiting:
+                raise ValueError(f"Construction file contains a cycle through {step.output}.")
+            visiting.add(step.output)
+            level = 0
+            for name in _step_inputs(step):
+                if name in producers:
+                    level = max(level, step_depth(producers[name], visiting) + 1)
+                elif name not in products:
+                    raise ValueError(f"Unknown sequence {name} used by {step.operation} step.")
+            visiting.discard(step.output)
+            depth[step.output] = level
+            return level
+
+        levels = []
+        for step in steps:
+            level = step_depth(step, set())
+            while len(levels) <= level:
+                levels.append([])
+            levels[level].append(step)
+        return levels
+
+def _step_inputs(step):
+    """
+    Returns:
+        list: Names of the sequences a step consumes.
+    """
+    if isinstance(step, PCR):
+        return [step.forward_oligo, step.reverse_oligo, step.template]
+    if isinstance(step, (Digest, Transform)):
+        return [step.dna]
+    if isinstance(step, (Ligate, GoldenGate, Gibson)):
+        return list(step.dnas)
+    raise ValueError(f"Unsupported operation: {step.operation}")
+
+def _step_params(step):
+    """
+    Returns:
+        tuple: The non-sequence parameters that influence a step's product.
+    """
+    if isinstance(step, Digest):
+        enzymes = [step.enzymes] if isinstance(step.enzymes, str) else step.enzymes
+        return (tuple(enzymes), step.fragSelect)
+    if isinstance(step, GoldenGate):
+        return (step.enzyme,)
+    return ()
+
+def _simulate_step(operation, params, inputs, settings):
+    """
+    Compute the product of a single step. Kept at module level so it can run in a worker process.
+
+    Parameters:
+        operation (str): The step operation ('PCR', 'Digest', ...).
+        params (tuple): The step parameters from _step_params.
+        inputs (tuple): The input Products, in the order given by _step_inputs.
+        settings (tuple): (enzymes, anneal_length, gibson_overlap) from the simulator.
+
+    Returns:
+        Product: The product of the step.
+    """
+    enzymes, anneal_length, gibson_overlap = settings
+    if operation == "PCR":
+        return pcr(inputs[0].sequence, inputs[1].sequence, inputs[2], anneal_length)
+    if operation == "Digest":
+        enzyme_names, frag_select = params
+        fragments = digest(inputs[0], [_enzyme(enzymes, name) for name in enzyme_names])
+        if not 0 <= frag_select < len(fragments):
+            raise ValueError(f"Fragment {frag_select} does not exist; digest produced {len(fragments)} fragments.")
+        return fragments[frag_select]
+    if operation == "Ligate":
+        return ligate(list(inputs))
+    if operation == "GoldenGate":
+        return golden_gate(list(inputs), _enzyme(enzymes, params[0]))
+    if operation == "Gibson":
+        return gibson(list(inputs), gibson_overlap)
+    if operation == "Transform":
+        return inputs[0]
+    raise ValueError(f"Unsupported operation: {operation}")
+
+def _enzyme(enzymes, name):
+    if name not in enzymes:
+        raise ValueError(f"Unsupported enzyme: {name}. Choose from: {list(enzymes.keys())}")
+    return enzymes[name]
+
+def pcr(forward_oligo, reverse_oligo, template, anneal_length=18):
+    """
+    Simulate a PCR by annealing the 3' end of each oligo to the template.
+
+    Parameters:
+        forward_oligo (str): The forward oligo; its 3' end must match the template.
+        reverse_oligo (str): The reverse oligo; its 3' end must match the opposite strand of the template.
+        template (Product): The template molecule.
+        anneal_length (int): Number of 3' bases of each oligo used for annealing.
+
+    Returns:
+        Product: The linear, blunt PCR product including the 5' tails of both oligos.
+    """
+    forward_oligo = forward_oligo.upper()
+    reverse_oligo = reverse_oligo.upper()
+    forward_anneal = forward_oligo[-anneal_length:]
+    reverse_anneal = reverse_complement(reverse_oligo[-anneal_length:])
+
+    for strand in (template.sequence, reverse_complement(template.sequence)):
+        searchable = strand + strand[:-1] if template.circular else strand
+        start = searchable.find(forward_anneal)
+        end = searchable.find(reverse_anneal)
+        if start == -1 or end == -1:
+            continue
+        start = start % len(strand)
+        end = end % len(strand) + len(reverse_anneal)
+        if end < start + len(forward_anneal):
+            if not template.circular:
+                continue
+            end += len(strand)
+        region = (strand + strand)[start:end] if template.circular else strand[start:end]
+        product = forward_oligo[:-len(forward_anneal)] + region + reverse_complement(reverse_oligo)[len(reverse_anneal):]
+        return Product(product)
+    raise ValueError("Oligos do not anneal to the template in a productive orientation.")
+
+def find_cuts(sequence, enzyme, circular=False):
+    """
+    Locate the cuts an enzyme makes on both strands of a sequence.
+
+    Parameters:
+        sequence (str): The top-strand sequence.
+        enzyme (tuple): (recognition site, top-strand cut, bottom-strand cut).
+        circular (bool): Whether sites spanning the origin should be considered.
+
+    Returns:
+        list: Sorted (start, end, overhang) cuts: the single-stranded region left by each cut in top-strand
+        coordinates, and its signed length (positive for a 5' overhang, negative for a 3' overhang). For a blunt
+        cutter start equals end.
+    """
+    site, top, bottom = enzyme
+    site_rc = reverse_complement(site)
+    n = len(sequence)
+    searchable = sequence + sequence[:len(site) - 1] if circular else sequence
+
+    patterns = [(site, (top, bottom))]
+    if site_rc != site:
+        patterns.append((site_rc, (len(site) - bottom, len(site) - top)))
+
+    # The top strand is cut first on both orientations of the site when the enzyme leaves a 5' overhang
+    polarity = 1 if top <= bottom else -1
+    cuts = set()
+    for pattern, offsets in patterns:
+        position = searchable.find(pattern)
+        while position != -1 and position < n:
+            start, end = sorted(position + offset for offset in offsets)
+            if circular:
+                cuts.add((start % n, start % n + end - start, polarity * (end - start)))
+            elif start >= 0 and end <= n:
+                cuts.add((start, end, polarity * (end - start)))
+            position = searchable.find(pattern, position + 1)
+    return sorted(cuts)
+
+def digest(product, enzymes):
+    """
+    Cut a molecule with one or more enzymes.
+
+    Parameters:
+        product (Product): The molecule to digest.
+        enzymes (list): Enzyme tuples as stored in ConstructionSimulator.enzymes.
+
+    Returns:
+        list: The fragments as Products, ordered by position on the top strand. Each fragment's sequence
+        spans both of its single-stranded overhangs.
+    """
+    sequence = product.sequence
+    cuts = sorted(set(cut for enzyme in enzymes for cut in find_cuts(sequence, enzyme, product.circular)))
+    if not cuts:
+        return [product]
+
+    if product.circular:
+        # Rotate so the first cut starts at the origin, then walk the cuts around the circle
+        origin = cuts[0][0]
+        rotated = sequence[origin:] + sequence[:origin]
+        doubled = rotated + rotated
+        cuts = [(start - origin, end - origin, overhang) for start, end, overhang in cuts]
+        boundaries = cuts + [(cuts[0][0] + len(sequence), cuts[0][1] + len(sequence), cuts[0][2])]
+        return [
+            Product(doubled[left[0]:right[1]], False, (left[2], right[2]))
+            for left, right in zip(boundaries, boundaries[1:])
+        ]
+
+    boundaries = [(0, 0, 0)] + cuts + [(len(sequence), len(sequence), 0)]
+    return [
+        Product(sequence[left[0]:right[1]], False, (left[2], right[2]))
+        for left, right in zip(boundaries, boundaries[1:])
+    ]
+
+def _join(left, right, overlap):
+    return left[:len(left) - overlap] + right if overlap else left + right
+
+def _sticky_match(left, right):
+    """
+    Returns:
+        bool: True if the right end of one fragment anneals to the left end of another: both blunt, or overhangs
+        of the same length, polarity (5' or 3') and sequence.
+    """
+    overhang = left.overhangs[1]
+    if overhang != right.overhangs[0]:
+        return False
+    k = abs(overhang)
+    return k == 0 or left.sequence[-k:] == right.sequence[:k]
+
+def ligate(fragments):
+    """
+    Ligate linear fragments in the order given, closing the molecule if its two ends are compatible sticky ends.
+    Blunt ends are joined between fragments, but never close the molecule.
+
+    Parameters:
+        fragments (list): The Products to ligate.
+
+    Returns:
+        Product: The ligation product.
+    """
+    if not fragments:
+        raise ValueError("Ligation requires at least one fragment.")
+    result = fragments[0]
+    for fragment in fragments[1:]:
+        if fragment.circular or result.circular or not _sticky_match(result, fragment):
+            raise ValueError("Fragment ends are not compatible for ligation.")
+        sequence = _join(result.sequence, fragment.sequence, abs(fragment.overhangs[0]))
+        result = Product(sequence, False, (result.overhangs[0], fragment.overhangs[1]))
+    if not result.circular and result.overhangs[1] and _sticky_match(result, result):
+        k = abs(result.overhangs[1])
+        return Product(result.sequence[:len(result.sequence) - k], True)
+    return result
+
+def golden_gate(dnas, enzyme):
+    """
+    Simulate a one-pot Golden Gate assembly: digest every part and chain the fragments that no longer
+    carry a recognition site by their overhangs until the circle closes.
+
+    Parameters:
+        dnas (list): The parts (Products) added to the reaction.
+        enzyme (tuple): The type IIS enzyme tuple.
+
+    Returns:
+        Product: The circular assembly product.
+    """
+    site = enzyme[0]
+    site_rc = reverse_complement(site)
+    fragments = [
+        fragment
+        for dna in dnas
+        for fragment in digest(dna, [enzyme])
+        if site not in fragment.sequence and site_rc not in fragment.sequence and all(fragment.overhangs)
+    ]
+    if not fragments:
+        raise ValueError("Golden Gate digest produced no assemblable fragments.")
+
+    by_left = {}
+    for fragment in fragments:
+        by_left.setdefault(fragment.sequence[:abs(fragment.overhangs[0])], fragment)
+
+    first = fragments[0]
+    start = first.sequence[:abs(first.overhangs[0])]
+    sequence = first.sequence
+    right = first
+    for _ in range(len(fragments)):
+        overhang = right.sequence[-abs(right.overhangs[1]):]
+        if overhang == start:
+            return Product(sequence[:len(sequence) - len(overhang)], True)
+        if overhang not in by_left:
+            raise ValueError(f"Golden Gate assembly could not be closed; no fragment with overhang {overhang}.")
+        right = by_left[overhang]
+        sequence = _join(sequence, right.sequence, len(overhang))
+    raise ValueError("Golden Gate assembly could not be closed.")
+
+def _overlap(left, right, minimum, maximum=200):
+    """
+    Returns:
+        int: Length of the longest suffix of left that is also a prefix of right, or 0 if shorter than minimum.
+    """
+    for k in range(min(len(left), len(right), maximum), minimum - 1, -1):
+        if left.endswith(right[:k]):
+            return k
+    return 0
+
+def gibson(dnas, min_overlap=15):
+    """
+    Simulate a Gibson assembly by joining the fragments in order through their terminal homology,
+    circularizing the product when its ends overlap.
+
+    Parameters:
+        dnas (list): The linear fragments (Products) in assembly order.
+        min_overlap (int): Minimum homology (bp) needed to join two fragments.
+
+    Returns:
+        Product: The assembly product, circular when the ends could be joined.
+    """
+    if not dnas:
+        raise ValueError("Gibson assembly requires at least one fragment.")
+    sequence = dnas[0].sequence
+    for fragment in dnas[1:]:
+        overlap = _overlap(sequence, fragment.sequence, min_overlap)
+        if not overlap:
+            raise ValueError("Adjacent Gibson fragments do not share enough homology.")
+        sequence = _join(sequence, fragment.sequence, overlap)
+    overlap = _overlap(sequence, sequence, min_overlap, min(200, len(sequence) // 2))
+    if overlap:
+        return Product(sequence[:len(sequence) - overlap], True)
+    return Product(sequence)